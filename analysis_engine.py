@@ -0,0 +1,1191 @@
+"""
+analysis_engine.py
+"""
+
+import cv2
+import numpy as np
+import pandas as pd
+import yaml
+from pathlib import Path
+from PIL import Image, ImageDraw, ImageFont
+from pose_store import open_pose_store
+from frame_source import SequentialFrameReader, FrameCache, FramePrefetcher
+from paw_area import (PawAreaAnalyzer, OtsuThresholdTracker, paw_bboxes, compile_pipeline,
+                      MORPHOLOGY_KERNELS)
+from parallel_analysis import run_parallel_analysis, raw_area_buffer
+from result_buffer import ResultBuffer
+from result_stream import ResultStream
+import os
+import hashlib
+import time
+import threading
+import warnings
+from collections import OrderedDict
+warnings.filterwarnings('ignore')
+
+
+class AnalysisCancelled(Exception):
+    """Анализ прерван пользователем"""
+
+
+class AnalysisObserver:
+    """Наблюдатель за ходом анализа; методы переопределяются по необходимости"""
+    
+    def on_progress(self, progress):
+        """Прогресс полного анализа (0-100)"""
+        
+    def on_status(self, status):
+        """Текстовый статус анализа"""
+
+
+class AnalysisEngine:
+    """Ядро анализа отпечатков лап без зависимости от Qt.
+    
+    О прогрессе и статусе ядро сообщает наблюдателям (add_observer);
+    графический интерфейс подключает наблюдателя, который превращает
+    события в сигналы Qt. Ядро сериализуется pickle: видео, кэши и
+    фоновые потоки не передаются и заново открываются при загрузке.
+    """
+
+    def __init__(self, video_path, csv_path, config_path='config.yaml'):
+        # Проверка файлов
+        if not Path(video_path).exists():
+            raise FileNotFoundError(f"Видео файл не найден: {video_path}")
+        if not Path(csv_path).exists():
+            raise FileNotFoundError(f"CSV файл не найден: {csv_path}")
+        if not Path(config_path).exists():
+            raise FileNotFoundError(f"Конфигурационный файл не найден: {config_path}")
+
+        self.video_path = video_path
+        self.csv_path = csv_path
+        self.config_path = config_path
+        
+        # Коэффициент перевода пикселей в миллиметры
+        # По умолчанию 0.3 мм/пиксель (реалистично для большинства видео)
+        self.pixel_to_mm_scale = 0.3
+        
+        # Порог достоверности точек DeepLabCut
+        self.likelihood_threshold = 0.6
+        
+        # Отмена длительного анализа и частота сообщений о прогрессе (сек)
+        self._cancel_requested = False
+        self.progress_interval = 0.1
+        self._last_progress_time = 0.0
+        
+        # Кэш декодированных кадров для интерактивного просмотра
+        self.frame_cache = FrameCache()
+        self._cap_lock = threading.Lock()
+        self.prefetcher = None
+        self._last_viewed_frame = None
+        
+        # Результаты в пикселях: значения в мм получаются из них при чтении,
+        # поэтому смена масштаба не требует повторной обработки видео
+        self.pixel_results = OrderedDict()
+        self.pixel_results_limit = 1024
+        self._pixel_results_lock = threading.Lock()
+        self.raw_results = None
+        self.raw_results_key = None
+        
+        # Размер порции кадров при пакетном расчете геометрии
+        self.geometry_chunk_frames = 65536
+        
+        # Полный анализ: ROI лап стольких кадров бинаризуются одним атласом
+        # (RoiAtlas); 0 — каждый ROI обрабатывается отдельно
+        self.roi_atlas_frames = 8
+        
+        # Статистика компонентов маски при просмотре кадра: 'contours' или 'stats'
+        # (connectedComponentsWithStats); периметр и солидность — по запросу
+        self.component_backend = 'contours'
+        self.component_shape_metrics = True
+        
+        # Полный анализ с порогом Otsu: порог лапы пересчитывается не чаще раза
+        # в otsu_check_frames кадров и только при дрейфе гистограммы ROI больше
+        # otsu_drift_tolerance (см. OtsuThresholdTracker); 0 — Otsu на каждом ROI.
+        # Состояние трекера сбрасывается каждые otsu_segment_frames кадров видео
+        self.otsu_check_frames = 0
+        self.otsu_drift_tolerance = 0.1
+        self.otsu_segment_frames = 240
+        
+        # Индекс прямоугольников лап по всем кадрам (строится при первом обращении)
+        self._bbox_index = None
+        self._bbox_lock = threading.Lock()
+        
+        # Наблюдатели за прогрессом и статусом
+        self.observers = []
+        
+        # Загружаем конфигурацию
+        self.load_config()
+        
+        # Инициализируем данные
+        self.load_data()
+        
+        # Настройка шрифтов
+        self.setup_fonts()
+        
+        # Цвета для визуализации
+        self.PAW_COLORS = {
+            'lf': (74, 144, 226),   # Синий
+            'rf': (46, 204, 113),   # Зеленый
+            'lb': (231, 76, 60),    # Красный
+            'rb': (241, 196, 15)    # Желтый
+        }
+        
+        self.PAW_LABELS = {
+            'lf': 'lf', 'rf': 'rf', 
+            'lb': 'lb', 'rb': 'rb'
+        }
+        
+        # Алгоритмы обработки
+        self.setup_algorithms()
+        self.area_analyzer = PawAreaAnalyzer()
+        
+    def set_pixel_to_mm_scale(self, scale):
+        """Установка коэффициента перевода пикселей в мм"""
+        self.pixel_to_mm_scale = float(scale)
+        
+    def get_pixel_to_mm_scale(self):
+        """Получение коэффициента перевода"""
+        return self.pixel_to_mm_scale
+        
+    def pixels_to_mm(self, pixels):
+        """Перевод пикселей в миллиметры"""
+        return pixels * self.pixel_to_mm_scale
+        
+    def pixels_to_mm2(self, pixels_squared):
+        """Перевод квадратных пикселей в квадратные миллиметры"""
+        return pixels_squared * (self.pixel_to_mm_scale ** 2)
+        
+    def load_config(self):
+        """Загрузка конфигурации"""
+        with open(self.config_path, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f)
+        
+        self.bodyparts = config['bodyparts']
+        self.skeleton = config.get('skeleton', [])
+        
+        # Группировка частей тела по лапам
+        self.paw_groups = self._define_paw_groups()
+        
+    def _define_paw_groups(self):
+        """Определение групп точек для каждой лапы"""
+        groups = {'lf': [], 'rf': [], 'lb': [], 'rb': []}
+        
+        for bodypart in self.bodyparts:
+            for paw_name in groups.keys():
+                if bodypart.startswith(paw_name + '_'):
+                    groups[paw_name].append(bodypart)
+        
+        return groups
+        
+    def load_data(self):
+        """Загрузка данных CSV и видео"""
+        # Координаты: CSV загружается в плотный массив (через файл-кэш рядом с ним),
+        # HDF5 DeepLabCut читается лениво, блоками и только по частям тела из конфигурации
+        self.pose = open_pose_store(self.csv_path, self.likelihood_threshold, bodyparts=self.bodyparts)
+        self.scorer = self.pose.scorer
+        
+        # Индексы точек каждой лапы в хранилище
+        self.paw_part_indices = {
+            paw_name: self.pose.indices(bodyparts)
+            for paw_name, bodyparts in self.paw_groups.items()
+        }
+        
+        # Открываем видео
+        self.open_video()
+            
+        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        
+    def open_video(self):
+        """Открытие VideoCapture для интерактивного чтения кадров"""
+        self.cap = cv2.VideoCapture(self.video_path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Не удалось открыть видео: {self.video_path}")
+            
+    def setup_fonts(self):
+        """Настройка шрифтов для текста"""
+        font_paths = [
+            "arial.ttf",
+            "DejaVuSans.ttf"
+        ]
+        
+        self.font = None
+        for font_path in font_paths:
+            try:
+                self.font = ImageFont.truetype(font_path, 24)
+                break
+            except (IOError, OSError):
+                continue
+        
+        if not self.font:
+            self.font = ImageFont.load_default()
+            
+    def setup_algorithms(self):
+        """Настройка алгоритмов обработки"""
+        # Ядра для морфологических операций (общие с PawAreaAnalyzer)
+        self.morphology_kernels = MORPHOLOGY_KERNELS
+        
+    def get_coords(self, frame_idx, bodypart, likelihood_threshold=0.6):
+        """Получение координат части тела с проверкой достоверности"""
+        return self.pose.get(frame_idx, bodypart, likelihood_threshold)
+        
+    def paw_bboxes(self):
+        """
+        Индекс прямоугольников лап для всех кадров видео
+        
+        Прямоугольники (точки лапы с отступом 15 пикселей, обрезанные
+        по кадру) считаются один раз по координатам, без чтения
+        видео, и используются при просмотре, полном и пакетном анализе.
+        
+        Returns:
+            tuple: (int32 (кадры, лапы, 4) — [x_min, y_min, x_max, y_max],
+                    bool (кадры, лапы) — у лапы достаточно достоверных точек);
+                    лапы в порядке paw_groups
+        """
+        with self._bbox_lock:
+            if self._bbox_index is None:
+                frame_shape = (self.height, self.width)
+                bboxes = np.zeros((self.total_frames, len(self.paw_groups), 4), dtype=np.int32)
+                bbox_valid = np.zeros((self.total_frames, len(self.paw_groups)), dtype=np.bool_)
+                
+                for start in range(0, self.total_frames, self.geometry_chunk_frames):
+                    stop = min(self.total_frames, start + self.geometry_chunk_frames)
+                    data, valid = self.pose.take(np.arange(start, stop))
+                    bboxes[start:stop], bbox_valid[start:stop] = paw_bboxes(
+                        data, valid, self.paw_part_indices, frame_shape
+                    )
+                    
+                self._bbox_index = (bboxes, bbox_valid)
+            return self._bbox_index
+            
+    def get_paw_bbox(self, frame_idx, paw_name, crop_pixels=0, frame_height=None):
+        """
+        Прямоугольник лапы из индекса (None, если точек недостаточно)
+        
+        При crop_pixels > 0 координаты переводятся в кадр, обрезанный
+        сверху и снизу на crop_pixels (высотой frame_height).
+        """
+        bboxes, bbox_valid = self.paw_bboxes()
+        paw_idx = list(self.paw_groups).index(paw_name)
+        if not 0 <= frame_idx < len(bbox_valid) or not bbox_valid[frame_idx, paw_idx]:
+            return None
+            
+        x_min, y_min, x_max, y_max = (int(v) for v in bboxes[frame_idx, paw_idx])
+        if crop_pixels > 0:
+            if frame_height is None:
+                frame_height = self.height - 2 * crop_pixels
+            y_min = max(0, y_min - crop_pixels)
+            y_max = min(frame_height, y_max - crop_pixels)
+        return (x_min, y_min, x_max, y_max)
+        
+    def calculate_sciatic_index(self, length_mm, width_mm):
+        """
+        Вычисление седалищного индекса
+        Формула: (Длина отпечатка / Ширина отпечатка) × 100
+        
+        Args:
+            length_mm: Длина отпечатка в мм
+            width_mm: Ширина отпечатка в мм
+            
+        Returns:
+            float: Седалищный индекс
+        """
+        if width_mm > 0:
+            return (length_mm / width_mm) * 100
+        return 0.0
+        
+    def calculate_enhanced_metrics(self, frame_idx, paw_name):
+        """Расчет улучшенных метрик для лапы в миллиметрах + седалищный индекс"""
+        metrics = {
+            'length_mm': 0.0,
+            'width_1_5_mm': 0.0,
+            'width_2_4_mm': 0.0,
+            'perimeter_mm': 0.0,
+            'aspect_ratio': 0.0,
+            'solidity': 0.0,
+            'eccentricity': 0.0,
+            'sciatic_index': 0.0  # Добавляем седалищный индекс
+        }
+        
+        # Тот же векторный расчет, что и для всего сеанса, но для одного кадра
+        data, valid = self.pose.take([frame_idx])
+        geometry = self._paw_geometry_to_mm(self._paw_geometry(data, valid, paw_name), paw_name)
+        
+        for key, values in geometry.items():
+            metrics[key] = float(values[0])
+            
+        return metrics
+        
+    def compute_geometry_metrics(self, frames=None):
+        """
+        Пакетный расчет длины, ширин и седалищного индекса для всех лап
+        
+        Args:
+            frames: slice или последовательность индексов кадров
+                    (по умолчанию все кадры видео)
+            
+        Returns:
+            dict: столбцы 'frame' и '{лапа}_{метрика}' в виде массивов NumPy
+        """
+        return self.geometry_to_mm(self.compute_geometry_pixels(frames))
+        
+    def compute_geometry_pixels(self, frames=None):
+        """
+        Геометрия лап в пикселях (не зависит от масштаба)
+        
+        Returns:
+            dict: столбцы 'frame' и '{лапа}_length_px', '{лапа}_width_1_5_px',
+                  '{лапа}_width_2_4_px'
+        """
+        if frames is None:
+            frames = slice(0, self.total_frames)
+        if isinstance(frames, slice):
+            frames = np.arange(*frames.indices(self.total_frames))
+        frames = np.asarray(frames, dtype=np.intp)
+        
+        # Координаты читаются порциями, чтобы ленивое хранилище (HDF5)
+        # не загружало весь сеанс в память
+        parts = {}
+        for start in range(0, max(len(frames), 1), self.geometry_chunk_frames):
+            data, valid = self.pose.take(frames[start:start + self.geometry_chunk_frames])
+            for paw_name in self.paw_groups.keys():
+                for key, values in self._paw_geometry(data, valid, paw_name).items():
+                    parts.setdefault(f'{paw_name}_{key}', []).append(values)
+                    
+        columns = {'frame': frames}
+        for column, values in parts.items():
+            columns[column] = np.concatenate(values)
+        return columns
+        
+    def geometry_to_mm(self, geometry_px):
+        """Перевод пиксельной геометрии в мм по текущему масштабу + седалищный индекс"""
+        columns = {'frame': geometry_px['frame']}
+        for paw_name in self.paw_groups.keys():
+            paw_px = {
+                key: geometry_px[f'{paw_name}_{key}']
+                for key in ['length_px', 'width_1_5_px', 'width_2_4_px']
+            }
+            for key, values in self._paw_geometry_to_mm(paw_px, paw_name).items():
+                columns[f'{paw_name}_{key}'] = values
+                
+        return columns
+        
+    def _paw_geometry(self, data, valid, paw_name):
+        """Геометрия одной лапы в пикселях для блока кадров (точки с низкой достоверностью = NaN)"""
+        n_frames = data.shape[0]
+        part_indices = self.paw_part_indices[paw_name]
+        
+        points = data[:, part_indices, :2].astype(np.float64)
+        points_valid = valid[:, part_indices]
+        points[~points_valid] = np.nan
+        
+        # Лапа учитывается, только если достоверны хотя бы 3 точки
+        paw_ok = points_valid.sum(axis=1) >= 3
+        
+        # Длина лапы: максимальное попарное расстояние между точками
+        diff = points[:, :, None, :] - points[:, None, :, :]
+        distances = self._vector_norm(diff)
+        if distances.shape[1] > 0:
+            max_distance = np.fmax.reduce(distances.reshape(n_frames, -1), axis=1)
+        else:
+            max_distance = np.full(n_frames, np.nan)
+        length_px = np.where(paw_ok, np.nan_to_num(max_distance), 0.0)
+        
+        def digit_width(first, second):
+            first_idx = self.pose.bodypart_index.get(f'{paw_name}_{first}')
+            second_idx = self.pose.bodypart_index.get(f'{paw_name}_{second}')
+            if first_idx is None or second_idx is None:
+                return np.zeros(n_frames)
+            
+            pair_ok = paw_ok & valid[:, first_idx] & valid[:, second_idx]
+            delta = (data[:, first_idx, :2].astype(np.float64)
+                     - data[:, second_idx, :2].astype(np.float64))
+            width_px = self._vector_norm(delta)
+            return np.where(pair_ok, np.nan_to_num(width_px), 0.0)
+        
+        # Ширина 1-5 только для задних лап
+        if paw_name in ['lb', 'rb']:
+            width_1_5_px = digit_width('digit1', 'digit5')
+        else:
+            width_1_5_px = np.zeros(n_frames)
+        width_2_4_px = digit_width('digit2', 'digit4')
+        
+        return {
+            'length_px': length_px,
+            'width_1_5_px': width_1_5_px,
+            'width_2_4_px': width_2_4_px
+        }
+        
+    @staticmethod
+    def _vector_norm(vectors):
+        """
+        Длины векторов по последней оси
+        
+        Скалярное произведение через matmul округляется так же, как
+        np.linalg.norm в покадровом расчете, поэтому метрики совпадают побитово.
+        """
+        vectors = np.ascontiguousarray(vectors)
+        return np.sqrt(np.matmul(vectors[..., None, :], vectors[..., :, None])[..., 0, 0])
+        
+    def _paw_geometry_to_mm(self, paw_px, paw_name):
+        """Метрики лапы в мм и седалищный индекс из пиксельной геометрии"""
+        length_mm = self.pixels_to_mm(paw_px['length_px'])
+        width_1_5_mm = self.pixels_to_mm(paw_px['width_1_5_px'])
+        width_2_4_mm = self.pixels_to_mm(paw_px['width_2_4_px'])
+        
+        # Седалищный индекс: основная ширина 2-4, для задних лап запасная 1-5
+        with np.errstate(divide='ignore', invalid='ignore'):
+            si_2_4 = (length_mm / width_2_4_mm) * 100
+            si_1_5 = (length_mm / width_1_5_mm) * 100
+        use_2_4 = (length_mm > 0) & (width_2_4_mm > 0)
+        use_1_5 = ~use_2_4 & (length_mm > 0) & (width_1_5_mm > 0)
+        sciatic_index = np.where(use_2_4, si_2_4, np.where(use_1_5, si_1_5, 0.0))
+        
+        return {
+            'length_mm': length_mm,
+            'width_1_5_mm': width_1_5_mm,
+            'width_2_4_mm': width_2_4_mm,
+            'sciatic_index': sciatic_index
+        }
+        
+    def analyze_paw_area_enhanced(self, frame, bbox, threshold_value, filters=None, render=True):
+        """
+        Анализ контактной области лапы (см. PawAreaAnalyzer.analyze)
+        
+        При render=False визуализация ROI не строится (None); полный анализ
+        видео использует PawAreaAnalyzer.measure, где нет и метрик компонентов.
+        Статистика компонентов считается бэкендом self.component_backend,
+        периметр и солидность — только при self.component_shape_metrics.
+        filters — словарь фильтров или готовый конвейер (preprocessing_pipeline).
+        """
+        return self.area_analyzer.analyze(
+            frame, bbox, threshold_value, filters, render,
+            component_backend=self.component_backend,
+            shape_metrics=self.component_shape_metrics
+        )
+        
+    def preprocessing_pipeline(self, filters=None):
+        """Скомпилированный конвейер обработки ROI для набора фильтров (общий для всех путей)"""
+        return compile_pipeline(filters)
+        
+    def apply_filters(self, image, filters):
+        """Применение включенных фильтров до порога (изображение в оттенках серого)"""
+        result = self.preprocessing_pipeline(filters).filter(image)
+        return result.copy() if result is image else result
+        
+    def apply_thresholding(self, image, threshold_value):
+        """Ручной порог или Otsu (threshold_value == -1)"""
+        _, binary = self.preprocessing_pipeline().threshold(image, threshold_value)
+        return binary
+        
+    def apply_morphology(self, binary_image, filters=None):
+        """Включенные морфологические этапы: закрытие и открытие"""
+        return self.preprocessing_pipeline(filters).morphology(binary_image.copy())
+        
+    def analyze_components(self, binary_image):
+        """Статистика компонентов бинарной маски (см. PawAreaAnalyzer.analyze_components)"""
+        return self.area_analyzer.analyze_components(
+            binary_image, backend=self.component_backend, shape_metrics=self.component_shape_metrics
+        )
+        
+    def read_frame(self, frame_idx):
+        """Декодированный кадр через LRU-кэш (None, если кадр не читается)"""
+        frame = self.frame_cache.get(frame_idx)
+        if frame is not None:
+            return frame
+            
+        # Интерактивный VideoCapture может использоваться из потока отрисовки
+        with self._cap_lock:
+            if self.cap is None:
+                return None
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+            ret, frame = self.cap.read()
+        if not ret:
+            return None
+            
+        self.frame_cache.put(frame_idx, frame)
+        return frame
+        
+    def configure_frame_cache(self, max_frames=None, max_bytes=None):
+        """Настройка размера кэша кадров (число кадров и лимит памяти в байтах)"""
+        self.frame_cache.configure(max_frames, max_bytes)
+        
+    def frame_cache_stats(self):
+        """Статистика попаданий и промахов кэша кадров"""
+        stats = self.frame_cache.stats()
+        stats['prefetched'] = self.prefetcher.prefetched if self.prefetcher else 0
+        return stats
+        
+    def enable_prefetch(self, depth=16, behind=4, max_bytes=None):
+        """
+        Включение фонового упреждающего чтения кадров
+        
+        Args:
+            depth: число кадров, читаемых в направлении движения
+            behind: число кадров позади текущей позиции
+            max_bytes: потолок памяти кэша кадров (None — без изменений)
+        """
+        self.disable_prefetch()
+        
+        # Кэш должен вмещать окно упреждения целиком, иначе кадры вытеснят друг друга
+        max_frames = max(self.frame_cache.max_frames, 2 * (depth + behind + 1))
+        self.frame_cache.configure(max_frames=max_frames, max_bytes=max_bytes)
+        
+        self.prefetcher = FramePrefetcher(self.video_path, self.frame_cache, depth, behind)
+        
+    def disable_prefetch(self):
+        """Остановка фонового чтения кадров"""
+        if self.prefetcher:
+            self.prefetcher.stop()
+            self.prefetcher = None
+            
+    def notify_frame_position(self, frame_idx):
+        """Сообщение о текущей позиции просмотра для упреждающего чтения"""
+        if self.prefetcher is None:
+            return
+            
+        previous = self._last_viewed_frame
+        direction = -1 if previous is not None and frame_idx < previous else 1
+        self._last_viewed_frame = frame_idx
+        self.prefetcher.request(frame_idx, direction)
+        
+    def get_data_for_frame(self, frame_idx, threshold_value=128, crop_pixels=0, filters=None,
+                           annotate=True):
+        """
+        Анализ лап одного кадра для просмотра
+        
+        Кадр не копируется: обрезка — это представление кадра из кэша, а ROI
+        лап вырезаются из него срезами. Аннотированный кадр (одна копия
+        обрезанного кадра) строится только при annotate=True; иначе вместо
+        него возвращается None, и его можно получить позже через
+        render_annotated_frame.
+        
+        Returns:
+            tuple: (аннотированный кадр или None, результаты по лапам)
+        """
+        if filters is None:
+            filters = {
+                'gaussian_blur': True,
+                'morphology': True,
+                'noise_reduction': True
+            }
+            
+        # Читаем кадр (из кэша, если он уже декодирован)
+        frame = self.read_frame(frame_idx)
+        
+        if frame is None:
+            return None, None
+            
+        # Обрезка (представление без копирования)
+        cropped_frame, crop_pixels = self._crop_frame(frame, crop_pixels)
+        
+        # Анализируем каждую лапу одним конвейером фильтров
+        pipeline = self.preprocessing_pipeline(filters)
+        frame_analysis_results = {}
+        
+        for paw_name in self.paw_groups.keys():
+            # Bounding box с отступом из индекса (в координатах обрезанного кадра)
+            bbox = self.get_paw_bbox(frame_idx, paw_name, crop_pixels, cropped_frame.shape[0])
+                    
+            if bbox is not None:
+                # Анализируем контактную область (или берем готовый результат в пикселях)
+                result_key = (frame_idx, paw_name, threshold_value, crop_pixels,
+                              pipeline.key, self.component_backend,
+                              self.component_shape_metrics)
+                area_px, viz_roi, analysis_data = self._cached_pixel_result(
+                    result_key,
+                    lambda: self.analyze_paw_area_enhanced(cropped_frame, bbox, threshold_value, pipeline)
+                )
+                
+                # Переводим площадь в мм²
+                area_mm2 = self.pixels_to_mm2(area_px)
+                
+                # Вычисляем метрики (уже в мм + седалищный индекс)
+                metrics = self.calculate_enhanced_metrics(frame_idx, paw_name)
+                
+                # Сохраняем результаты
+                frame_analysis_results[paw_name] = {
+                    'area_mm2': area_mm2,  # Площадь в мм²
+                    'roi_image': viz_roi,  # Правильное цветное изображение для визуализации
+                    'bbox': bbox,
+                    'analysis_data': analysis_data,
+                    **metrics  # Все метрики уже в мм + седалищный индекс
+                }
+                           
+            else:
+                # Нет достаточно точек для анализа
+                frame_analysis_results[paw_name] = {
+                    'area_mm2': 0.0,
+                    'roi_image': np.zeros((100, 100, 3), dtype=np.uint8),  # Цветное изображение
+                    'bbox': None,
+                    'analysis_data': {},
+                    'length_mm': 0.0,
+                    'width_1_5_mm': 0.0,
+                    'width_2_4_mm': 0.0,
+                    'perimeter_mm': 0.0,
+                    'aspect_ratio': 0.0,
+                    'solidity': 0.0,
+                    'eccentricity': 0.0,
+                    'sciatic_index': 0.0  # Седалищный индекс
+                }
+                
+        annotated_frame = None
+        if annotate:
+            annotated_frame = self.render_annotated_frame(
+                frame_idx, frame_analysis_results, crop_pixels, frame
+            )
+            
+        return annotated_frame, frame_analysis_results
+        
+    @staticmethod
+    def _crop_frame(frame, crop_pixels):
+        """Обрезка кадра сверху и снизу (представление); возвращает и фактический отступ"""
+        h = frame.shape[0]
+        if crop_pixels > 0 and (h - 2 * crop_pixels) > 0:
+            return frame[crop_pixels:h - crop_pixels, :], crop_pixels
+        return frame, 0
+        
+    def render_annotated_frame(self, frame_idx, frame_analysis_results, crop_pixels=0, frame=None):
+        """
+        Кадр с прямоугольниками лап, площадью, седалищным индексом и скелетом
+        
+        Нужен только для отображения и экспорта; это единственная копия кадра
+        на пути просмотра.
+        """
+        if frame is None:
+            frame = self.read_frame(frame_idx)
+            if frame is None:
+                return None
+                
+        cropped_frame, crop_pixels = self._crop_frame(frame, crop_pixels)
+        annotated_frame = cropped_frame.copy()
+        
+        for paw_name, paw_result in frame_analysis_results.items():
+            bbox = paw_result.get('bbox')
+            if bbox is None:
+                continue
+            x_min, y_min, x_max, y_max = bbox
+            
+            # Рисуем bbox и информацию на кадре
+            color = self.PAW_COLORS[paw_name]
+            cv2.rectangle(annotated_frame, (x_min, y_min), (x_max, y_max), color, 2)
+            
+            text = f"{self.PAW_LABELS[paw_name]}: {paw_result['area_mm2']:.1f}mm2"
+            cv2.putText(annotated_frame, text, (x_min, y_min - 25),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+            
+            # Добавляем седалищный индекс
+            if paw_result['sciatic_index'] > 0:
+                sciatic_text = f"SI: {paw_result['sciatic_index']:.1f}"
+                cv2.putText(annotated_frame, sciatic_text, (x_min, y_min - 10),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+                
+        # Рисуем скелет
+        self.draw_skeleton(annotated_frame, frame_idx, y_offset=-crop_pixels)
+        
+        return annotated_frame
+        
+    @staticmethod
+    def _filters_key(filters):
+        """Хешируемый ключ полного набора фильтров (см. PreprocessingPipeline.filters_key)"""
+        return compile_pipeline(filters).key
+        
+    def _cached_pixel_result(self, key, compute):
+        """Результат анализа ROI в пикселях из LRU-кэша (compute — при промахе)"""
+        with self._pixel_results_lock:
+            result = self.pixel_results.get(key)
+            if result is not None:
+                self.pixel_results.move_to_end(key)
+                return result
+                
+        result = compute()
+        
+        with self._pixel_results_lock:
+            self.pixel_results[key] = result
+            while len(self.pixel_results) > self.pixel_results_limit:
+                self.pixel_results.popitem(last=False)
+        return result
+        
+    def draw_skeleton(self, frame, frame_idx, y_offset=0, likelihood_threshold=0.6):
+        """Рисование скелета"""
+        # Рисуем соединения
+        for connection in self.skeleton:
+            point1, point2 = connection
+            
+            coords1 = self.get_coords(frame_idx, point1, likelihood_threshold)
+            coords2 = self.get_coords(frame_idx, point2, likelihood_threshold)
+            
+            if coords1 and coords2:
+                p1 = (int(coords1[0]), int(coords1[1] + y_offset))
+                p2 = (int(coords2[0]), int(coords2[1] + y_offset))
+                
+                cv2.line(frame, p1, p2, (255, 255, 0), 2)
+                
+        # Рисуем точки
+        for bodypart in self.bodyparts:
+            coords = self.get_coords(frame_idx, bodypart, likelihood_threshold)
+            
+            if coords:
+                # Определяем цвет точки по принадлежности к лапе
+                color = (255, 255, 255)  # Белый по умолчанию
+                
+                for paw_name, paw_points in self.paw_groups.items():
+                    if bodypart in paw_points:
+                        color = self.PAW_COLORS[paw_name]
+                        break
+                        
+                center = (int(coords[0]), int(coords[1] + y_offset))
+                confidence = coords[2]
+                
+                # Размер точки зависит от достоверности
+                radius = max(1, int(2 * confidence))
+                
+                cv2.circle(frame, center, radius, color, -1)
+                cv2.circle(frame, center, radius + 1, (255, 255, 255), 1)
+                
+    def analyze_entire_video(self, threshold_value, filters=None, progress_callback=None,
+                             frame_stride=1, sequential_decode=True, n_workers=1,
+                             checkpoint_path=None, resume=True,
+                             start_frame=0, end_frame=None, sample_fps=None):
+        """
+        Исправленная версия анализа всего видео с переводом в мм + седалищный индекс
+        
+        Кадры читаются отдельным потоковым декодером: при sequential_decode=True
+        видео декодируется один раз подряд, а при frame_stride > 1 лишние кадры
+        пропускаются через grab(). При n_workers != 1 видео делится на непрерывные
+        диапазоны кадров, которые обрабатываются пулом процессов
+        (n_workers=None — по числу ядер).
+        
+        Для быстрого предварительного просмотра можно анализировать только
+        диапазон [start_frame, end_frame) с шагом frame_stride или с частотой
+        sample_fps кадров в секунду (см. sample_frames). Столбец 'frame'
+        результатов содержит настоящие номера кадров видео.
+        
+        При заданном checkpoint_path пиксельные результаты по мере обработки
+        пишутся на диск (ResultStream). Если анализ с теми же параметрами был
+        прерван или завершился аварийно, при resume=True уже обработанные кадры
+        берутся из файла, и анализ продолжается с последней контрольной точки.
+        """
+        if filters is None:
+            filters = {
+                'gaussian_blur': True,
+                'morphology': True,
+                'noise_reduction': True
+            }
+            
+        self._cancel_requested = False
+        self._last_progress_time = 0.0
+        
+        # Повторный запуск с теми же параметрами не требует обработки видео
+        sampling = (start_frame, end_frame, frame_stride, sample_fps)
+        raw_key = (self._threshold_key(threshold_value), self._filters_key(filters), sampling)
+        if self.raw_results is not None and self.raw_results_key == raw_key:
+            self._report_progress(100, progress_callback, force=True)
+            self._notify_status("Анализ завершен")
+            return self.results_from_raw()
+            
+        planned_frames = self.sample_frames(start_frame, end_frame, frame_stride, sample_fps)
+        frame_indices = planned_frames
+        
+        stream = None
+        if checkpoint_path is not None:
+            stream = ResultStream(
+                checkpoint_path, raw_area_buffer(self.paw_groups.keys(), 0).columns,
+                dtypes={'frame': np.int64},
+                run_key=self.result_stream_key(threshold_value, filters, sampling)
+            )
+            previous = self._latest_rows(stream.open(resume))
+            if len(previous['frame']):
+                frame_indices = np.setdiff1d(planned_frames, previous['frame']).tolist()
+                self._notify_status(f"Продолжение анализа: готово {len(previous['frame'])} кадров")
+                
+        # Кадры, где ни у одной лапы нет достаточного числа достоверных точек,
+        # не декодируются: их площади остаются незаполненными (в мм — нули)
+        frame_indices, skipped_frames = self.plan_frames(frame_indices)
+        if len(skipped_frames):
+            self._notify_status(f"Без анализа изображения: {len(skipped_frames)} кадров без достоверных лап")
+            
+        if stream and len(previous['frame']) and self._otsu_reuse(threshold_value):
+            previous, frame_indices = self._restart_otsu_segments(previous, frame_indices)
+            
+        try:
+            if not len(frame_indices):
+                area_buffer = raw_area_buffer(self.paw_groups.keys(), 0)
+            elif n_workers != 1:
+                self._notify_status("Параллельный анализ кадров...")
+                area_buffer = run_parallel_analysis(
+                    self.video_path, self.paw_bboxes(), frame_indices, self.paw_groups.keys(),
+                    threshold_value, filters, n_workers,
+                    atlas_frames=self.roi_atlas_frames,
+                    otsu_reuse=self._otsu_reuse(threshold_value),
+                    progress_callback=lambda p: self._report_progress(p, progress_callback),
+                    should_cancel=self.is_cancel_requested,
+                    chunk_callback=stream.append if stream else None
+                )
+                if area_buffer is None:
+                    raise AnalysisCancelled("Анализ отменен")
+            else:
+                area_buffer = self._analyze_frames(
+                    frame_indices, threshold_value, filters, progress_callback, sequential_decode,
+                    stream
+                )
+        except BaseException:
+            # Обработанные кадры остаются на диске до следующего запуска
+            if stream:
+                stream.close(complete=False)
+            raise
+            
+        if len(skipped_frames):
+            skipped_rows = raw_area_buffer(self.paw_groups.keys(), len(skipped_frames))
+            skipped_rows.n_rows = len(skipped_frames)
+            skipped_rows['frame'][:] = skipped_frames
+            area_buffer = self._merge_area_rows(skipped_rows.as_dict(), area_buffer, planned_frames)
+            
+        if stream:
+            stream.close(complete=True)
+            area_buffer = self._merge_area_rows(previous, area_buffer, planned_frames)
+            
+        # Финальное обновление прогресса
+        self._report_progress(100, progress_callback, force=True)
+            
+        self._notify_status("Анализ завершен")
+        
+        self.raw_results = self._collect_raw_results(area_buffer)
+        self.raw_results_key = raw_key
+        
+        return self.results_from_raw()
+        
+    def plan_frames(self, frame_indices):
+        """
+        Планирование обработки по координатам, без чтения видео
+        
+        Returns:
+            tuple: (кадры, где хотя бы одну лапу нужно анализировать по изображению,
+                    остальные кадры) — возрастающие списки номеров
+        """
+        frames = np.asarray(frame_indices, dtype=np.intp)
+        _, bbox_valid = self.paw_bboxes()
+        needed = bbox_valid[frames].any(axis=1)
+        return frames[needed].tolist(), frames[~needed].tolist()
+        
+    def sample_frames(self, start_frame=0, end_frame=None, frame_stride=1, sample_fps=None):
+        """
+        Номера кадров для анализа
+        
+        Args:
+            start_frame, end_frame: диапазон кадров [start_frame, end_frame)
+                                    (end_frame=None — до конца видео)
+            frame_stride: каждый N-й кадр диапазона
+            sample_fps: частота выборки в кадрах в секунду по времени видео;
+                        если задана, заменяет frame_stride
+            
+        Returns:
+            range или np.ndarray: возрастающие номера кадров
+        """
+        start_frame = max(0, int(start_frame))
+        end_frame = self.total_frames if end_frame is None else min(int(end_frame), self.total_frames)
+        
+        if not sample_fps:
+            return range(start_frame, max(start_frame, end_frame), max(1, int(frame_stride)))
+            
+        if sample_fps < 0:
+            raise ValueError(f"Частота выборки должна быть положительной: {sample_fps}")
+        if not self.fps or self.fps <= 0:
+            raise ValueError("Частота кадров видео неизвестна, выборка по времени невозможна")
+        if sample_fps >= self.fps:
+            return range(start_frame, max(start_frame, end_frame))
+            
+        # Моменты времени с шагом 1/sample_fps, округленные до ближайшего кадра
+        times = np.arange(start_frame / self.fps, end_frame / self.fps, 1.0 / sample_fps)
+        frames = np.unique(np.rint(times * self.fps).astype(np.intp))
+        return frames[(frames >= start_frame) & (frames < end_frame)]
+        
+    def result_stream_key(self, threshold_value, filters, sampling=None):
+        """
+        Ключ потока результатов: файлы сеанса и параметры обработки
+        
+        При повторном использовании порога Otsu площадь кадра зависит от
+        выбранных кадров его сегмента, поэтому в ключ входит и выборка sampling.
+        """
+        key = {'threshold': self._threshold_key(threshold_value), 'filters': self._filters_key(filters)}
+        if self._otsu_reuse(threshold_value):
+            key['sampling'] = sampling
+        for name, path in (('video', self.video_path), ('pose', self.csv_path)):
+            stat = os.stat(path)
+            key[name] = [str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns]
+        return key
+        
+    def _otsu_reuse(self, threshold_value):
+        """Параметры OtsuThresholdTracker для прогона или None (Otsu на каждом ROI)"""
+        if threshold_value == -1 and self.otsu_check_frames > 0:
+            return (self.otsu_check_frames, self.otsu_drift_tolerance, self.otsu_segment_frames)
+        return None
+        
+    def _restart_otsu_segments(self, previous, frame_indices):
+        """
+        Повторная обработка сегментов Otsu, прерванных на середине
+        
+        Порог кадра зависит от предыдущих кадров сегмента, поэтому строки
+        из файла для сегментов, где остались необработанные кадры, отбрасываются,
+        а сегменты анализируются заново с первого кадра.
+        """
+        segment_frames = self.otsu_segment_frames
+        pending_segments = np.unique(np.asarray(frame_indices, dtype=np.intp) // segment_frames)
+        redo = np.isin(previous['frame'] // segment_frames, pending_segments)
+        if not redo.any():
+            return previous, frame_indices
+            
+        frame_indices = np.union1d(frame_indices, previous['frame'][redo]).tolist()
+        previous = {name: values[~redo] for name, values in previous.items()}
+        return previous, frame_indices
+        
+    @staticmethod
+    def _latest_rows(rows):
+        """Строки без повторов кадров: для повторно обработанного кадра — последняя"""
+        frames = rows['frame']
+        if len(np.unique(frames)) == len(frames):
+            return rows
+        _, last = np.unique(frames[::-1], return_index=True)
+        keep = np.sort(len(frames) - 1 - last)
+        return {name: values[keep] for name, values in rows.items()}
+        
+    def _threshold_key(self, threshold_value):
+        """Порог вместе с параметрами повторного использования Otsu (влияют на результат)"""
+        otsu_reuse = self._otsu_reuse(threshold_value)
+        return threshold_value if otsu_reuse is None else [threshold_value, *otsu_reuse]
+        
+    def default_checkpoint_path(self, directory):
+        """Путь потока результатов для видео сеанса в каталоге directory"""
+        video_path = Path(self.video_path).resolve()
+        digest = hashlib.sha1(str(video_path).encode('utf-8')).hexdigest()[:8]
+        return Path(directory) / f"{video_path.stem}_{digest}.stream"
+        
+    def _merge_area_rows(self, previous, area_buffer, frame_indices):
+        """Объединение строк из файла с новыми строками в порядке кадров"""
+        keep = np.isin(previous['frame'], frame_indices)
+        merged = raw_area_buffer(self.paw_groups.keys(), int(keep.sum()) + area_buffer.n_rows)
+        merged.extend({name: values[keep] for name, values in previous.items()})
+        merged.extend(area_buffer.as_dict())
+        merged.sort_by('frame')
+        return merged
+        
+    def _collect_raw_results(self, area_buffer):
+        """Столбцы результатов в пикселях: площади лап и геометрия по координатам"""
+        raw = area_buffer.as_dict()
+        
+        # Геометрия считается одним пакетом для обработанных кадров;
+        # площадь NaN — не измерялась (меньше 3 достоверных точек)
+        raw.update(self.compute_geometry_pixels(raw['frame']))
+        return raw
+        
+    def results_from_raw(self, raw=None):
+        """
+        Таблица результатов в мм по текущему масштабу из пиксельных данных
+        
+        Видео не читается, поэтому после смены масштаба таблица
+        пересчитывается за миллисекунды. Столбцы записываются в предвыделенный
+        буфер, и DataFrame строится поверх него без копирования.
+        """
+        if raw is None:
+            raw = self.raw_results
+        n_rows = 0 if raw is None else len(raw['frame'])
+        
+        results = ResultBuffer(self.result_columns(), n_rows, dtypes={'frame': np.int64})
+        if raw is None:
+            return results.dataframe()
+            
+        results.n_rows = n_rows
+        results['frame'][:] = raw['frame']
+        
+        geometry = self.geometry_to_mm(raw)
+        for paw_name in self.paw_groups.keys():
+            results[f'{paw_name}_area_mm2'][:] = self.pixels_to_mm2(np.nan_to_num(raw[f'{paw_name}_area_px']))
+            metrics = ['length_mm', 'width_2_4_mm', 'sciatic_index']
+            if paw_name in ['lb', 'rb']:
+                metrics.append('width_1_5_mm')
+            for metric in metrics:
+                column = f'{paw_name}_{metric}'
+                results[column][:] = geometry[column]
+            # perimeter_mm, aspect_ratio, solidity, eccentricity остаются нулевыми
+                
+        return results.dataframe()
+        
+    def threshold_table(self, raw=None):
+        """
+        Пороги бинаризации, примененные к каждой лапе в каждом кадре
+        
+        Сохраняются рядом с результатами, чтобы анализ можно было повторить
+        (в том числе с порогом Otsu). NaN — лапа в кадре не анализировалась.
+        """
+        if raw is None:
+            raw = self.raw_results
+        columns = ['frame'] + [f'{paw_name}_threshold' for paw_name in self.paw_groups.keys()]
+        if raw is None:
+            return pd.DataFrame(columns=columns)
+        return pd.DataFrame({name: raw[name] for name in columns})
+        
+    def _analyze_frames(self, frame_indices, threshold_value, filters, progress_callback=None,
+                        sequential_decode=True, stream=None):
+        """
+        Расчет площадей лап в текущем процессе с потоковым чтением кадров
+        
+        Готовые строки группами передаются в stream (ResultStream), в том числе
+        при отмене и ошибке.
+        """
+        reader = SequentialFrameReader(self.video_path, sequential=sequential_decode)
+        area_buffer = raw_area_buffer(self.paw_groups.keys(), len(frame_indices))
+        area_columns = [(paw_name, area_buffer[f'{paw_name}_area_px'], area_buffer[f'{paw_name}_threshold'])
+                        for paw_name in self.paw_groups.keys()]
+        frame_column = area_buffer['frame']
+        paw_names = list(self.paw_groups.keys())
+        bboxes, bbox_valid = self.paw_bboxes()
+        n_frames = max(1, len(frame_indices))
+        streamed = 0
+        
+        otsu_reuse = self._otsu_reuse(threshold_value)
+        otsu_tracker = OtsuThresholdTracker(*otsu_reuse) if otsu_reuse else None
+        
+        frame_areas = self.area_analyzer.iter_frame_areas(
+            reader.iter_frames(frame_indices), bboxes, bbox_valid, paw_names,
+            threshold_value, filters, atlas_frames=self.roi_atlas_frames, otsu_tracker=otsu_tracker
+        )
+        
+        try:
+            for frame_idx, areas, thresholds in frame_areas:
+                if self._cancel_requested:
+                    raise AnalysisCancelled("Анализ отменен")
+                    
+                # Обновляем прогресс (по доле выбранных кадров)
+                self._report_progress((area_buffer.n_rows / n_frames) * 100, progress_callback)
+                
+                row = area_buffer.add_row()
+                frame_column[row] = frame_idx
+                for paw_name, column, threshold_column in area_columns:
+                    if areas[paw_name] is not None:
+                        column[row] = areas[paw_name]
+                    if paw_name in thresholds:
+                        threshold_column[row] = thresholds[paw_name]
+                
+                # Обновляем статус
+                if row % 50 == 0:
+                    self._notify_status(f"Обработано {row}/{len(frame_indices)} кадров (кадр {frame_idx})")
+                    
+                if stream and area_buffer.n_rows - streamed >= stream.group_rows:
+                    stream.append(self._buffer_rows(area_buffer, streamed))
+                    streamed = area_buffer.n_rows
+        finally:
+            reader.close()
+            if stream:
+                stream.append(self._buffer_rows(area_buffer, streamed))
+                
+        if otsu_tracker:
+            self._notify_status(f"Порог Otsu: проверок {otsu_tracker.checks}, "
+                                f"пересчетов {otsu_tracker.recomputed}")
+            
+        return area_buffer
+        
+    @staticmethod
+    def _buffer_rows(buffer, start):
+        """Заполненные строки буфера начиная со start"""
+        return {name: values[start:] for name, values in buffer.as_dict().items()}
+        
+    def add_observer(self, observer):
+        """Подписка наблюдателя (AnalysisObserver или объект с on_progress/on_status)"""
+        if observer not in self.observers:
+            self.observers.append(observer)
+            
+    def remove_observer(self, observer):
+        """Отписка наблюдателя"""
+        if observer in self.observers:
+            self.observers.remove(observer)
+            
+    def _notify_progress(self, progress):
+        """Сообщение о прогрессе (0-100) всем наблюдателям"""
+        for observer in list(self.observers):
+            observer.on_progress(progress)
+        
+    def _notify_status(self, status):
+        """Сообщение о статусе всем наблюдателям"""
+        for observer in list(self.observers):
+            observer.on_status(status)
+        
+    def request_cancel(self):
+        """Запрос отмены текущего полного анализа (можно вызывать из другого потока)"""
+        self._cancel_requested = True
+        
+    def is_cancel_requested(self):
+        """Был ли запрошен останов анализа"""
+        return self._cancel_requested
+        
+    def _report_progress(self, progress, progress_callback=None, force=False):
+        """
+        Передача прогресса наблюдателям и в функцию обратного вызова
+        
+        Сообщения отправляются не чаще одного раза в progress_interval секунд.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_progress_time < self.progress_interval:
+            return
+        self._last_progress_time = now
+        
+        self._notify_progress(int(progress))
+        if progress_callback:
+            progress_callback(progress)
+            
+    def result_columns(self):
+        """Порядок столбцов таблицы результатов полного анализа"""
+        columns = ['frame']
+        for paw_name in self.paw_groups.keys():
+            columns += [
+                f'{paw_name}_area_mm2',
+                f'{paw_name}_length_mm',
+                f'{paw_name}_width_2_4_mm',
+                f'{paw_name}_sciatic_index'  # Седалищный индекс
+            ]
+            if paw_name in ['lb', 'rb']:
+                columns.append(f'{paw_name}_width_1_5_mm')
+            columns += [
+                f'{paw_name}_perimeter_mm',
+                f'{paw_name}_aspect_ratio',
+                f'{paw_name}_solidity',
+                f'{paw_name}_eccentricity'
+            ]
+        return columns
+        
+    def close(self):
+        """Освобождение ресурсов"""
+        self.disable_prefetch()
+        self.frame_cache.clear()
+        self.pose.close()
+        with self._cap_lock:
+            if self.cap:
+                self.cap.release()
+                self.cap = None
+                
+    def __getstate__(self):
+        """
+        Состояние для pickle (процессы-обработчики, пакетный анализ)
+        
+        VideoCapture, блокировки, фоновое чтение, кэши кадров и результатов,
+        шрифт и наблюдатели (например, объекты Qt) не передаются.
+        """
+        state = self.__dict__.copy()
+        for name in ('cap', '_cap_lock', 'prefetcher', 'frame_cache', 'font',
+                     '_pixel_results_lock', 'pixel_results', 'observers', '_bbox_lock'):
+            state.pop(name, None)
+        return state
+        
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.frame_cache = FrameCache()
+        self._cap_lock = threading.Lock()
+        self.prefetcher = None
+        self._last_viewed_frame = None
+        self.pixel_results = OrderedDict()
+        self._pixel_results_lock = threading.Lock()
+        self._bbox_lock = threading.Lock()
+        self.observers = []
+        self.setup_fonts()
+        self.open_video()
\ No newline at end of file
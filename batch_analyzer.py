@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+batch_analyzer.py
+Пакетный анализ отпечатков лап без графического интерфейса
+
+Манифест — CSV-файл со столбцами video и pose (CSV или .h5 DeepLabCut) и необязательным name;
+относительные пути считаются от каталога манифеста:
+
+    video,pose,name
+    session01.mp4,session01DLC.csv,rat01_day1
+    session02.mp4,session02DLC.csv,
+
+Пример запуска:
+    python batch_analyzer.py manifest.csv --config config.yaml --output results --workers 4
+"""
+
+import sys
+import os
+import argparse
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from analysis_engine import AnalysisEngine
+
+
+PAW_NAMES = ['lf', 'rf', 'lb', 'rb']
+
+
+def load_manifest(manifest_path):
+    """Чтение манифеста сеансов"""
+    manifest_path = Path(manifest_path)
+    manifest = pd.read_csv(manifest_path, dtype=str, keep_default_na=False)
+
+    missing = {'video', 'pose'} - set(manifest.columns)
+    if missing:
+        raise ValueError(f"В манифесте нет столбцов: {', '.join(sorted(missing))}")
+
+    sessions = []
+    for _, row in manifest.iterrows():
+        video_path = manifest_path.parent / row['video']
+        pose_path = manifest_path.parent / row['pose']
+        name = row.get('name') or video_path.stem
+        sessions.append({
+            'name': name,
+            'video_path': str(video_path),
+            'pose_path': str(pose_path)
+        })
+
+    return sessions
+
+
+def summarize_session(name, results_df):
+    """Сводка по сеансу: средняя площадь и седалищный индекс каждой лапы"""
+    summary = {'session': name, 'frames': len(results_df)}
+
+    for paw in PAW_NAMES:
+        area_col = f'{paw}_area_mm2'
+        sciatic_col = f'{paw}_sciatic_index'
+
+        if area_col in results_df.columns:
+            areas = results_df[area_col][results_df[area_col] > 0]
+            summary[f'{paw}_mean_area_mm2'] = areas.mean() if len(areas) else 0.0
+
+        if sciatic_col in results_df.columns:
+            data = results_df[sciatic_col][results_df[sciatic_col] > 0]
+            summary[f'{paw}_mean_sciatic_index'] = data.mean() if len(data) else 0.0
+            summary[f'{paw}_normal_percent'] = (data >= 80).sum() / len(data) * 100 if len(data) else 0.0
+
+    return summary
+
+
+def analyze_session(task):
+    """
+    Анализ одного сеанса (выполняется в процессе-обработчике)
+
+    Returns:
+        dict: строка сводки; при ошибке содержит текст ошибки в 'error'
+    """
+    name = task['name']
+    started = time.time()
+
+    try:
+        engine = AnalysisEngine(task['video_path'], task['pose_path'], task['config_path'])
+        try:
+            engine.set_pixel_to_mm_scale(task['scale'])
+            engine.otsu_check_frames = task['otsu_check_frames']
+            engine.otsu_drift_tolerance = task['otsu_tolerance']
+            
+            # Прерванный сеанс продолжается с последней контрольной точки
+            checkpoint_path = Path(task['output_dir']) / f"results_{name}.stream"
+            results_df = engine.analyze_entire_video(
+                task['threshold'],
+                task['filters'],
+                frame_stride=task['stride'],
+                start_frame=task['start_frame'],
+                end_frame=task['end_frame'],
+                sample_fps=task['sample_fps'],
+                n_workers=task['frame_workers'],
+                checkpoint_path=checkpoint_path,
+                resume=task['resume']
+            )
+            thresholds_df = engine.threshold_table()
+        finally:
+            engine.close()
+
+        output_path = Path(task['output_dir']) / f"results_{name}_mm_with_sciatic.csv"
+        results_df.to_csv(output_path, index=False)
+        
+        # Примененные пороги — рядом с результатами, для воспроизводимости
+        thresholds_df.to_csv(Path(task['output_dir']) / f"results_{name}_thresholds.csv", index=False)
+
+        summary = summarize_session(name, results_df)
+        summary['output'] = str(output_path)
+        summary['error'] = ''
+
+    except Exception as e:
+        summary = {'session': name, 'frames': 0, 'output': '', 'error': f"{type(e).__name__}: {e}"}
+
+    summary['seconds'] = round(time.time() - started, 2)
+    return summary
+
+
+def run_batch(sessions, config_path, output_dir, threshold=128, scale=0.3,
+              filters=None, stride=1, workers=1, frame_workers=1, resume=True,
+              start_frame=0, end_frame=None, sample_fps=None,
+              otsu_check_frames=0, otsu_tolerance=0.1):
+    """
+    Анализ всех сеансов манифеста
+
+    Args:
+        workers: число сеансов, обрабатываемых параллельно
+        frame_workers: число процессов на кадры внутри одного сеанса
+        resume: продолжать прерванные сеансы по файлам results_{name}.stream
+        start_frame, end_frame, sample_fps: выборка кадров (см. AnalysisEngine.sample_frames)
+        otsu_check_frames, otsu_tolerance: повторное использование порога Otsu
+                                           (см. OtsuThresholdTracker; 0 — выключено)
+
+    Returns:
+        pd.DataFrame: сводная таблица по сеансам
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    tasks = [{
+        **session,
+        'config_path': str(config_path),
+        'output_dir': str(output_dir),
+        'threshold': threshold,
+        'scale': scale,
+        'filters': filters,
+        'stride': stride,
+        'start_frame': start_frame,
+        'end_frame': end_frame,
+        'sample_fps': sample_fps,
+        'frame_workers': frame_workers,
+        'resume': resume,
+        'otsu_check_frames': otsu_check_frames,
+        'otsu_tolerance': otsu_tolerance
+    } for session in sessions]
+
+    summaries = []
+
+    if workers == 1:
+        for task in tasks:
+            summary = analyze_session(task)
+            summaries.append(summary)
+            report_session(summary, len(summaries), len(tasks))
+    else:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = [executor.submit(analyze_session, task) for task in tasks]
+            for future in as_completed(futures):
+                summary = future.result()
+                summaries.append(summary)
+                report_session(summary, len(summaries), len(tasks))
+
+    # Порядок сводки совпадает с порядком манифеста
+    order = {task['name']: i for i, task in enumerate(tasks)}
+    summaries.sort(key=lambda summary: order.get(summary['session'], len(order)))
+
+    summary_df = pd.DataFrame(summaries)
+    summary_df.to_csv(output_dir / "batch_summary.csv", index=False)
+    return summary_df
+
+
+def report_session(summary, done, total):
+    """Вывод результата сеанса в консоль"""
+    if summary['error']:
+        print(f"❌ [{done}/{total}] {summary['session']}: {summary['error']}")
+    else:
+        print(f"✅ [{done}/{total}] {summary['session']}: "
+              f"{summary['frames']} кадров за {summary['seconds']} сек")
+
+
+def parse_args(argv=None):
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(
+        description="Пакетный анализ отпечатков лап по манифесту пар видео/CSV DeepLabCut"
+    )
+    parser.add_argument('manifest', help="CSV-манифест со столбцами video, pose[, name]")
+    parser.add_argument('--config', default='config.yaml', help="Конфигурация DeepLabCut (config.yaml)")
+    parser.add_argument('--output', default='results', help="Каталог для результатов")
+    parser.add_argument('--threshold', type=int, default=128,
+                        help="Порог бинаризации (0-255, -1 — автоматический Otsu)")
+    parser.add_argument('--otsu-check-frames', type=int, default=0,
+                        help="При пороге Otsu: проверять гистограмму ROI раз в N кадров "
+                             "и пересчитывать порог только при дрейфе (0 — Otsu на каждом кадре)")
+    parser.add_argument('--otsu-tolerance', type=float, default=0.1,
+                        help="Допустимый дрейф гистограммы ROI (0-1) до пересчета порога Otsu")
+    parser.add_argument('--scale', type=float, default=0.3, help="Масштаб, мм/пиксель")
+    parser.add_argument('--stride', type=int, default=1, help="Шаг по кадрам")
+    parser.add_argument('--start', type=int, default=0, help="Первый кадр диапазона")
+    parser.add_argument('--end', type=int, default=None, help="Конец диапазона кадров (не включается)")
+    parser.add_argument('--sample-fps', type=float, default=None,
+                        help="Частота выборки, кадров в секунду (заменяет --stride)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Число сеансов, обрабатываемых параллельно (0 — по числу ядер)")
+    parser.add_argument('--frame-workers', type=int, default=1,
+                        help="Число процессов на кадры внутри сеанса")
+    parser.add_argument('--no-resume', action='store_true',
+                        help="Не продолжать прерванные сеансы, анализировать заново")
+    parser.add_argument('--no-gaussian-blur', action='store_true', help="Отключить гауссово размытие")
+    parser.add_argument('--no-morphology', action='store_true', help="Отключить морфологию")
+    parser.add_argument('--no-noise-reduction', action='store_true', help="Отключить подавление шума")
+    parser.add_argument('--median-blur', action='store_true', help="Включить медианный фильтр")
+    parser.add_argument('--clahe', action='store_true', help="Включить выравнивание контраста CLAHE")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Главная функция"""
+    args = parse_args(argv)
+
+    sessions = load_manifest(args.manifest)
+    if not sessions:
+        print("⚠️  Манифест пуст")
+        return 1
+
+    filters = {
+        'gaussian_blur': not args.no_gaussian_blur,
+        'median_blur': args.median_blur,
+        'clahe': args.clahe,
+        'morphology': not args.no_morphology,
+        'noise_reduction': not args.no_noise_reduction
+    }
+
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+
+    print(f"🔬 Сеансов: {len(sessions)}, процессов: {workers}")
+    summary_df = run_batch(
+        sessions, args.config, args.output,
+        threshold=args.threshold,
+        scale=args.scale,
+        filters=filters,
+        stride=args.stride,
+        workers=workers,
+        frame_workers=args.frame_workers,
+        resume=not args.no_resume,
+        start_frame=args.start,
+        end_frame=args.end,
+        sample_fps=args.sample_fps,
+        otsu_check_frames=args.otsu_check_frames,
+        otsu_tolerance=args.otsu_tolerance
+    )
+
+    failed = (summary_df['error'] != '').sum()
+    print(f"📄 Сводка: {Path(args.output) / 'batch_summary.csv'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
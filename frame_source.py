@@ -0,0 +1,237 @@
+"""
+frame_source.py
+"""
+
+import threading
+from collections import OrderedDict
+
+import cv2
+
+
+class SequentialFrameReader:
+    """Потоковое чтение кадров видео.
+
+    Видео декодируется один раз от начала к концу: ненужные кадры
+    пропускаются через grab() без преобразования в изображение, а
+    позиционирование (set) выполняется только для больших пропусков
+    и для восстановления после кадра, который не удалось прочитать.
+    """
+
+    def __init__(self, video_path, sequential=True, seek_threshold=250):
+        self.video_path = video_path
+        self.sequential = sequential
+        self.seek_threshold = seek_threshold
+
+        self.cap = cv2.VideoCapture(video_path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Не удалось открыть видео: {video_path}")
+
+        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.position = 0
+
+    def seek(self, frame_idx):
+        """Явное позиционирование на кадр"""
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+        self.position = frame_idx
+
+    def iter_frames(self, frame_indices):
+        """
+        Генератор кадров в порядке возрастания индексов
+
+        Args:
+            frame_indices: возрастающая последовательность индексов кадров
+
+        Yields:
+            tuple: (индекс кадра, изображение BGR); нечитаемые кадры пропускаются
+        """
+        for frame_idx in frame_indices:
+            if (not self.sequential or self.position is None
+                    or frame_idx < self.position
+                    or frame_idx - self.position > self.seek_threshold):
+                self.seek(frame_idx)
+            else:
+                # Пропускаем промежуточные кадры без полного декодирования
+                while self.position < frame_idx:
+                    if not self.cap.grab():
+                        break
+                    self.position += 1
+                if self.position != frame_idx:
+                    self.seek(frame_idx)
+
+            ret, frame = self.cap.read()
+            if not ret:
+                # Как и прежде, кадр пропускается; позиция восстанавливается
+                # на следующем кадре через явный seek
+                self.position = None
+                continue
+
+            self.position = frame_idx + 1
+            yield frame_idx, frame
+
+    def close(self):
+        """Освобождение ресурсов"""
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+
+class FrameCache:
+    """LRU-кэш декодированных кадров с ограничением по числу кадров и памяти.
+
+    Кэшированные кадры доступны только для чтения: потребители, которым
+    нужно рисовать на кадре, делают копию.
+    """
+
+    def __init__(self, max_frames=64, max_bytes=512 * 1024 * 1024):
+        self.max_frames = max_frames
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, frame_idx):
+        """Кадр из кэша или None"""
+        with self._lock:
+            frame = self._frames.get(frame_idx)
+            if frame is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(frame_idx)
+            self.hits += 1
+            return frame
+
+    def __contains__(self, frame_idx):
+        with self._lock:
+            return frame_idx in self._frames
+
+    def put(self, frame_idx, frame):
+        """Добавление кадра с вытеснением самых старых"""
+        if frame.nbytes > self.max_bytes or self.max_frames <= 0:
+            return
+        frame.flags.writeable = False
+
+        with self._lock:
+            old = self._frames.pop(frame_idx, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._frames[frame_idx] = frame
+            self._bytes += frame.nbytes
+            self._evict()
+
+    def configure(self, max_frames=None, max_bytes=None):
+        """Изменение размера кэша"""
+        with self._lock:
+            if max_frames is not None:
+                self.max_frames = max_frames
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        """Очистка кэша и статистики"""
+        with self._lock:
+            self._frames.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Статистика попаданий и заполнения"""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0.0,
+                'frames': len(self._frames),
+                'bytes': self._bytes,
+                'max_frames': self.max_frames,
+                'max_bytes': self.max_bytes
+            }
+
+    def _evict(self):
+        while self._frames and (len(self._frames) > self.max_frames
+                                or self._bytes > self.max_bytes):
+            _, frame = self._frames.popitem(last=False)
+            self._bytes -= frame.nbytes
+
+
+class FramePrefetcher:
+    """Фоновое упреждающее чтение кадров в FrameCache.
+
+    Поток декодирует окно кадров вокруг текущей позиции (depth кадров
+    в направлении движения и behind кадров позади) собственным
+    VideoCapture, поэтому не мешает чтению кадров в потоке интерфейса.
+    """
+
+    def __init__(self, video_path, cache, depth=16, behind=4):
+        self.cache = cache
+        self.depth = depth
+        self.behind = behind
+        self.prefetched = 0
+
+        self._reader = SequentialFrameReader(video_path)
+        self._condition = threading.Condition()
+        self._target = None
+        self._stopped = False
+
+        self._thread = threading.Thread(target=self._run, name='FramePrefetcher', daemon=True)
+        self._thread.start()
+
+    def request(self, frame_idx, direction=1):
+        """Новая позиция просмотра и направление движения (+1 вперед, -1 назад)"""
+        with self._condition:
+            self._target = (frame_idx, direction)
+            self._condition.notify()
+
+    def window(self, frame_idx, direction):
+        """Кадры окна упреждения в порядке приоритета"""
+        ahead, back = (self.depth, self.behind) if direction >= 0 else (self.behind, self.depth)
+        forward = range(frame_idx + 1, frame_idx + 1 + ahead)
+        backward = range(frame_idx - 1, frame_idx - 1 - back, -1)
+        if direction < 0:
+            forward, backward = backward, forward
+
+        frames = [frame_idx] + list(forward) + list(backward)
+        return [i for i in frames if 0 <= i < self._reader.total_frames]
+
+    def stop(self):
+        """Остановка потока и освобождение декодера"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join()
+        self._reader.close()
+
+    def _should_abort(self, window):
+        """Прерывание чтения: остановка или переход за пределы текущего окна"""
+        with self._condition:
+            if self._stopped:
+                return True
+            return self._target is not None and self._target[0] not in window
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._target is None and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                frame_idx, direction = self._target
+                self._target = None
+
+            window = self.window(frame_idx, direction)
+            missing = [i for i in window if i not in self.cache]
+            if not missing:
+                continue
+            window = set(window)
+
+            # Окно читается по возрастанию: один seek и дальше подряд,
+            # даже если пользователь листает назад
+            for read_idx, frame in self._reader.iter_frames(sorted(missing)):
+                self.cache.put(read_idx, frame)
+                self.prefetched += 1
+                if self._should_abort(window):
+                    break
@@ -5,6 +5,7 @@ main_window_v2.py
 
 import sys
 import os
+import tempfile
 import pandas as pd
 from pathlib import Path
 from PyQt5.QtWidgets import (
@@ -15,10 +16,10 @@ from PyQt5.QtWidgets import (
     QToolBar, QAction, QMenuBar, QMessageBox, QComboBox,
     QTextEdit, QScrollArea, QDoubleSpinBox
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer, QPropertyAnimation, QEasingCurve
+from PyQt5.QtCore import Qt, QObject, QThread, pyqtSignal, QTimer, QPropertyAnimation, QEasingCurve
 from PyQt5.QtGui import QImage, QPixmap, QFont, QIcon, QPalette, QColor, QPainter, QBrush
 
-from enhanced_analysis_core import EnhancedAnalysisCore
+from enhanced_analysis_core import EnhancedAnalysisCore, AnalysisCancelled
 from modern_video_widget import ModernVideoWidget
 from advanced_plot_widget import AdvancedPlotWidget
 from processing_dialog import ProcessingDialog
@@ -219,12 +220,78 @@ class PawDisplayWidget(QFrame):
             self.roi_label.clear()
 
 
+class AnalysisWorker(QObject):
+    """Полный анализ видео в отдельном потоке"""
+    
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    
+    def __init__(self, analysis_core, threshold_value, filters, checkpoint_path=None, sampling=None):
+        super().__init__()
+        self.analysis_core = analysis_core
+        self.threshold_value = threshold_value
+        self.filters = filters
+        self.checkpoint_path = checkpoint_path
+        self.sampling = sampling or {}
+        
+    def run(self):
+        """Запуск анализа (выполняется в потоке QThread)"""
+        try:
+            results_df = self.analysis_core.analyze_entire_video(
+                self.threshold_value,
+                self.filters,
+                checkpoint_path=self.checkpoint_path,
+                **self.sampling
+            )
+        except AnalysisCancelled:
+            self.cancelled.emit()
+            return
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+            
+        self.finished.emit(results_df)
+
+
+class FrameRenderWorker(QObject):
+    """Анализ и отрисовка одного кадра вне потока интерфейса"""
+    
+    rendered = pyqtSignal(object, int, object, object)
+    
+    def render(self, analysis_core, frame_idx, threshold_value, crop_pixels, filters):
+        """
+        Обработка запроса; результат возвращается сигналом rendered
+        
+        Сигнал отправляется всегда: при ошибке с None вместо результатов,
+        чтобы окно сняло флаг отрисовки и обработало следующий запрос.
+        Ядро возвращается вместе с результатом, чтобы окно отбросило
+        кадры видео, замененного за время отрисовки.
+        """
+        annotated_frame, frame_results = None, None
+        try:
+            annotated_frame, frame_results = analysis_core.get_data_for_frame(
+                frame_idx, threshold_value, crop_pixels, filters
+            )
+            
+            # Упреждающее чтение соседних кадров в направлении движения
+            analysis_core.notify_frame_position(frame_idx)
+        except Exception as e:
+            print(f"Ошибка отрисовки кадра {frame_idx}: {e}")
+        finally:
+            self.rendered.emit(analysis_core, frame_idx, annotated_frame, frame_results)
+
+
 class MainWindowV2(QMainWindow):
     
+    render_requested = pyqtSignal(object, int, int, int, object)
+    
     def __init__(self):
         super().__init__()
         self.analysis_core = None
         self.processing_thread = None
+        self.analysis_worker = None
+        self.analysis_dialog = None
         self.results_df = pd.DataFrame()
         self.video_path = None
         self.csv_path = None
@@ -233,6 +300,7 @@ class MainWindowV2(QMainWindow):
         self.setup_ui()
         self.setup_style()
         self.setup_connections()
+        self.setup_frame_updates()
         
         
     def setup_ui(self):
@@ -665,8 +733,47 @@ class MainWindowV2(QMainWindow):
         self.noise_reduction_check.setChecked(True)
         filter_layout.addWidget(self.noise_reduction_check)
         
+        self.median_blur_check = QCheckBox("Медианный фильтр")
+        self.median_blur_check.setChecked(False)
+        filter_layout.addWidget(self.median_blur_check)
+        
+        self.clahe_check = QCheckBox("Выравнивание контраста (CLAHE)")
+        self.clahe_check.setChecked(False)
+        filter_layout.addWidget(self.clahe_check)
+        
         layout.addWidget(filter_group)
         
+        # Выборка кадров для быстрого предварительного анализа
+        sampling_group = QGroupBox("Выборка кадров")
+        sampling_group.setStyleSheet(threshold_group.styleSheet())
+        sampling_layout = QVBoxLayout(sampling_group)
+        
+        stride_controls = QHBoxLayout()
+        stride_controls.addWidget(QLabel("Каждый N-й кадр:"))
+        
+        self.frame_stride_spinbox = QSpinBox()
+        self.frame_stride_spinbox.setRange(1, 1000)
+        self.frame_stride_spinbox.setValue(1)
+        stride_controls.addWidget(self.frame_stride_spinbox)
+        sampling_layout.addLayout(stride_controls)
+        
+        fps_controls = QHBoxLayout()
+        fps_controls.addWidget(QLabel("Кадров в секунду:"))
+        
+        self.sample_fps_spinbox = QDoubleSpinBox()
+        self.sample_fps_spinbox.setRange(0.0, 240.0)
+        self.sample_fps_spinbox.setValue(0.0)
+        self.sample_fps_spinbox.setSingleStep(0.5)
+        self.sample_fps_spinbox.setDecimals(1)
+        self.sample_fps_spinbox.setSpecialValueText("все")
+        self.sample_fps_spinbox.valueChanged.connect(
+            lambda value: self.frame_stride_spinbox.setEnabled(value == 0)
+        )
+        fps_controls.addWidget(self.sample_fps_spinbox)
+        sampling_layout.addLayout(fps_controls)
+        
+        layout.addWidget(sampling_group)
+        
         # Информация о видео
         info_group = QGroupBox("Информация")
         info_group.setStyleSheet(threshold_group.styleSheet())
@@ -979,6 +1086,38 @@ class MainWindowV2(QMainWindow):
         self.gaussian_blur_check.toggled.connect(self.update_view)
         self.morphology_check.toggled.connect(self.update_view)
         self.noise_reduction_check.toggled.connect(self.update_view)
+        self.median_blur_check.toggled.connect(self.update_view)
+        self.clahe_check.toggled.connect(self.update_view)
+        
+    def setup_frame_updates(self):
+        """
+        Планировщик обновления кадра
+        
+        Изменения слайдеров, порога, обрезки и фильтров за интервал таймера
+        объединяются в один запрос с последним состоянием. Одновременно
+        выполняется не более одной отрисовки; промежуточные запросы,
+        пришедшие за это время, отбрасываются.
+        """
+        self.frame_update_timer = QTimer(self)
+        self.frame_update_timer.setSingleShot(True)
+        self.frame_update_timer.setInterval(30)
+        self.frame_update_timer.timeout.connect(self.dispatch_frame_update)
+        
+        self.render_in_flight = False
+        self.render_pending = False
+        
+        # Графики после смены масштаба перестраиваются один раз после паузы
+        self.plot_refresh_timer = QTimer(self)
+        self.plot_refresh_timer.setSingleShot(True)
+        self.plot_refresh_timer.setInterval(300)
+        self.plot_refresh_timer.timeout.connect(self.refresh_plots)
+        
+        self.render_thread = QThread(self)
+        self.render_worker = FrameRenderWorker()
+        self.render_worker.moveToThread(self.render_thread)
+        self.render_requested.connect(self.render_worker.render)
+        self.render_worker.rendered.connect(self.on_frame_rendered)
+        self.render_thread.start()
         
     def preset_size_changed(self, index):
         """Изменение предустановки размера собаки"""
@@ -999,9 +1138,19 @@ class MainWindowV2(QMainWindow):
         if self.analysis_core:
             self.analysis_core.set_pixel_to_mm_scale(value)
             
+            # Результаты полного анализа пересчитываются из пиксельных данных без видео
+            if not self.results_df.empty and self.analysis_core.raw_results is not None:
+                self.results_df = self.analysis_core.results_from_raw()
+                self.plot_refresh_timer.start()
+            
         # Обновляем отображение
         self.update_view()
         
+    def refresh_plots(self):
+        """Перестроение графиков по текущей таблице результатов"""
+        if not self.results_df.empty:
+            self.plot_widget.plot_results(self.results_df)
+        
     def update_sciatic_summary(self, frame_results):
         """Обновление сводки седалищного индекса"""
         if not frame_results:
@@ -1040,6 +1189,11 @@ class MainWindowV2(QMainWindow):
             
     def load_files(self):
         """Загрузка файлов пользователем"""
+        if self.processing_thread is not None:
+            # Ядро используется потоком полного анализа
+            self.status_bar.showMessage("Дождитесь завершения или отмените полный анализ")
+            return
+            
         video_path, _ = QFileDialog.getOpenFileName(
             self, "Выберите видео файл", "", 
             "Video Files (*.mp4 *.avi *.mov *.mkv)"
@@ -1066,6 +1220,10 @@ class MainWindowV2(QMainWindow):
         processing_dialog = ProcessingDialog(self, title="Обработка видео")
         processing_dialog.show()
         
+        # Пока идет загрузка, полный анализ текущего видео не запускается:
+        # finalize_loading закрывает его ядро
+        self.analyze_btn.setEnabled(False)
+        
         # Создаем список этапов обработки
         processing_stages = [
             (10, "Анализ видео файла...", 1000),
@@ -1102,6 +1260,10 @@ class MainWindowV2(QMainWindow):
             self.video_path = video_path
             self.csv_path = csv_path
             
+            # Освобождаем ресурсы предыдущего видео (в т.ч. поток упреждающего чтения)
+            if self.analysis_core:
+                self.analysis_core.close()
+                
             self.analysis_core = EnhancedAnalysisCore(
                 self.video_path, 
                 self.csv_path, 
@@ -1110,6 +1272,9 @@ class MainWindowV2(QMainWindow):
             
             self.analysis_core.set_pixel_to_mm_scale(self.scale_spinbox.value())
             
+            # Фоновое чтение соседних кадров для мгновенного перехода между ними
+            self.analysis_core.enable_prefetch()
+            
             # Настройка интерфейса
             self.frame_slider.setEnabled(True)
             self.analyze_btn.setEnabled(True)
@@ -1144,9 +1309,9 @@ class MainWindowV2(QMainWindow):
         scale = self.analysis_core.get_pixel_to_mm_scale()
         info = f"""Файл: {Path(self.video_path).name}
 Кадров: {self.analysis_core.total_frames}
-Разрешение: {self.analysis_core.cap.get(4):.0f}x{self.analysis_core.cap.get(3):.0f}
-FPS: {self.analysis_core.cap.get(5):.1f}
-Длительность: {self.analysis_core.total_frames / self.analysis_core.cap.get(5):.1f} сек
+Разрешение: {self.analysis_core.height:.0f}x{self.analysis_core.width:.0f}
+FPS: {self.analysis_core.fps:.1f}
+Длительность: {self.analysis_core.total_frames / self.analysis_core.fps:.1f} сек
 
 CSV файл: {Path(self.csv_path).name}
 Частей тела: {len(self.analysis_core.bodyparts)}
@@ -1170,37 +1335,68 @@ CSV файл: {Path(self.csv_path).name}
         """Получение текущего порога"""
         return -1 if self.auto_threshold_check.isChecked() else self.threshold_slider.value()
         
+    def get_current_filters(self):
+        """Получение текущего набора фильтров"""
+        return {
+            'gaussian_blur': self.gaussian_blur_check.isChecked(),
+            'median_blur': self.median_blur_check.isChecked(),
+            'clahe': self.clahe_check.isChecked(),
+            'morphology': self.morphology_check.isChecked(),
+            'noise_reduction': self.noise_reduction_check.isChecked()
+        }
+        
     def update_view(self):
         """Обновление отображения"""
         if self.analysis_core and self.frame_slider.isEnabled():
             self.update_ui_for_frame(self.frame_slider.value())
             
     def update_ui_for_frame(self, frame_idx):
-        """Обновление UI для конкретного кадра"""
+        """Запрос обновления UI для конкретного кадра (выполняется отложенно)"""
         if not self.analysis_core:
             return
             
         self.current_frame = frame_idx
         
+        if not self.frame_update_timer.isActive():
+            self.frame_update_timer.start()
+            
+    def dispatch_frame_update(self):
+        """Отправка последнего состояния интерфейса на отрисовку"""
+        if not self.analysis_core:
+            return
+            
+        if self.render_in_flight:
+            self.render_pending = True
+            return
+            
         # Обновляем масштаб в анализаторе
         self.analysis_core.set_pixel_to_mm_scale(self.scale_spinbox.value())
         
         # Получаем параметры фильтров
-        filters = {
-            'gaussian_blur': self.gaussian_blur_check.isChecked(),
-            'morphology': self.morphology_check.isChecked(),
-            'noise_reduction': self.noise_reduction_check.isChecked()
-        }
+        filters = self.get_current_filters()
         
-        # Анализируем кадр
-        annotated_frame, frame_results = self.analysis_core.get_data_for_frame(
-            frame_idx, 
-            self.get_current_threshold(), 
+        self.render_in_flight = True
+        self.render_pending = False
+        
+        # Анализируем кадр в потоке отрисовки
+        self.render_requested.emit(
+            self.analysis_core,
+            self.current_frame,
+            self.get_current_threshold(),
             self.crop_spinbox.value(),
             filters
         )
         
-        if annotated_frame is None:
+    def on_frame_rendered(self, analysis_core, frame_idx, annotated_frame, frame_results):
+        """Применение результата отрисовки кадра"""
+        self.render_in_flight = False
+        
+        # За время отрисовки состояние изменилось — сразу запускаем новую
+        if self.render_pending:
+            self.dispatch_frame_update()
+            
+        # Кадр предыдущего видео (перезагрузка во время отрисовки) не показываем
+        if annotated_frame is None or analysis_core is not self.analysis_core:
             return
             
         # Обновляем информацию о кадре
@@ -1233,63 +1429,112 @@ CSV файл: {Path(self.csv_path).name}
             QMessageBox.warning(self, "Предупреждение", "Сначала загрузите видео и CSV файл")
             return
             
+        # Повторный запуск во время анализа не допускается
+        if self.processing_thread is not None:
+            return
+            
         # Показываем диалог обработки
-        processing_dialog = ProcessingDialog(self, title="Полный анализ видео с седалищным индексом")
-        processing_dialog.show()
+        self.analysis_dialog = ProcessingDialog(self, title="Полный анализ видео с седалищным индексом")
+        self.analysis_dialog.show()
+        self.analysis_dialog.show_cancel_button()
         
-        try:
-            processing_dialog.set_status("Подготовка к анализу...")
-            processing_dialog.set_progress(5)
-            QApplication.processEvents()
-            
-            # Обновляем масштаб в анализаторе
-            self.analysis_core.set_pixel_to_mm_scale(self.scale_spinbox.value())
-            
-            # Имитируем процесс анализа
-            processing_dialog.set_status("Анализ кадров с расчетом седалищного индекса...")
-            
-            filters = {
-                'gaussian_blur': self.gaussian_blur_check.isChecked(),
-                'morphology': self.morphology_check.isChecked(),
-                'noise_reduction': self.noise_reduction_check.isChecked()
-            }
-            
-            # Запускаем анализ всего видео
-            self.results_df = self.analysis_core.analyze_entire_video(
-                self.get_current_threshold(),
-                filters,
-                progress_callback=lambda p: (
-                    processing_dialog.set_progress(5 + int(p * 0.85)),
-                    processing_dialog.set_status(f"Обработка кадров... {p:.1f}%"),
-                    QApplication.processEvents()
-                )
-            )
-            
-            processing_dialog.set_progress(95)
-            processing_dialog.set_status("Построение графиков и анализ седалищного индекса...")
-            QApplication.processEvents()
-            
-            # Обновляем графики
-            self.plot_widget.plot_results(self.results_df)
-            
-            processing_dialog.set_progress(100)
-            processing_dialog.set_status("Анализ завершен!")
-            QApplication.processEvents()
-            
-            processing_dialog.close()
-            
-            # Переключаемся на вкладку графиков
-            self.tabs.setCurrentIndex(1)
-            
-            # Показываем краткую сводку по седалищному индексу
-            self.show_sciatic_summary()
-            
-            self.status_bar.showMessage("Полный анализ с седалищным индексом завершен успешно")
-            
-        except Exception as e:
-            processing_dialog.close()
-            QMessageBox.critical(self, "Ошибка", f"Ошибка при анализе:\n{str(e)}")
+        self.analysis_dialog.set_status("Подготовка к анализу...")
+        self.analysis_dialog.set_progress(5)
+        
+        # Обновляем масштаб в анализаторе
+        self.analysis_core.set_pixel_to_mm_scale(self.scale_spinbox.value())
+        
+        filters = self.get_current_filters()
+        
+        # Результаты пишутся на диск по ходу анализа: после отмены или сбоя
+        # повторный запуск продолжается с последней контрольной точки
+        checkpoint_path = self.analysis_core.default_checkpoint_path(
+            Path(tempfile.gettempdir()) / "paw_analysis"
+        )
+        
+        # Анализ выполняется в отдельном потоке, прогресс приходит через сигналы ядра
+        self.processing_thread = QThread(self)
+        sampling = {
+            'frame_stride': self.frame_stride_spinbox.value(),
+            'sample_fps': self.sample_fps_spinbox.value() or None
+        }
+        
+        self.analysis_worker = AnalysisWorker(
+            self.analysis_core, self.get_current_threshold(), filters, checkpoint_path, sampling
+        )
+        self.analysis_worker.moveToThread(self.processing_thread)
+        
+        self.processing_thread.started.connect(self.analysis_worker.run)
+        self.analysis_worker.finished.connect(self.on_full_analysis_finished)
+        self.analysis_worker.failed.connect(self.on_full_analysis_failed)
+        self.analysis_worker.cancelled.connect(self.on_full_analysis_cancelled)
+        self.processing_thread.finished.connect(self.cleanup_full_analysis)
+        
+        self.analysis_core.progress_updated.connect(self.on_full_analysis_progress)
+        self.analysis_core.status_updated.connect(self.analysis_dialog.set_details)
+        self.analysis_dialog.cancel_requested.connect(self.analysis_core.request_cancel)
+        
+        self.analyze_btn.setEnabled(False)
+        self.load_btn.setEnabled(False)
+        self.analysis_dialog.set_status("Анализ кадров с расчетом седалищного индекса...")
+        self.processing_thread.start()
+        
+    def on_full_analysis_progress(self, progress):
+        """Обновление диалога по сигналу прогресса ядра"""
+        if self.analysis_dialog and self.analysis_dialog.is_processing:
+            self.analysis_dialog.set_progress(5 + int(progress * 0.85))
+            self.analysis_dialog.set_status(f"Обработка кадров... {progress}%")
             
+    def on_full_analysis_finished(self, results_df):
+        """Завершение полного анализа"""
+        self.processing_thread.quit()
+        self.results_df = results_df
+        
+        self.analysis_dialog.set_progress(95)
+        self.analysis_dialog.set_status("Построение графиков и анализ седалищного индекса...")
+        
+        # Обновляем графики
+        self.plot_widget.plot_results(self.results_df)
+        
+        self.analysis_dialog.set_progress(100)
+        self.analysis_dialog.set_status("Анализ завершен!")
+        self.analysis_dialog.close()
+        
+        # Переключаемся на вкладку графиков
+        self.tabs.setCurrentIndex(1)
+        
+        # Показываем краткую сводку по седалищному индексу
+        self.show_sciatic_summary()
+        
+        self.status_bar.showMessage("Полный анализ с седалищным индексом завершен успешно")
+        
+    def on_full_analysis_failed(self, message):
+        """Ошибка полного анализа"""
+        self.processing_thread.quit()
+        self.analysis_dialog.close()
+        QMessageBox.critical(self, "Ошибка", f"Ошибка при анализе:\n{message}")
+        
+    def on_full_analysis_cancelled(self):
+        """Анализ отменен пользователем"""
+        self.processing_thread.quit()
+        self.status_bar.showMessage("Полный анализ отменен")
+        
+    def cleanup_full_analysis(self):
+        """Отключение сигналов и освобождение потока после анализа"""
+        # Сигналы отключаются от ядра, с которым запускался анализ
+        worker_core = self.analysis_worker.analysis_core
+        worker_core.progress_updated.disconnect(self.on_full_analysis_progress)
+        worker_core.status_updated.disconnect(self.analysis_dialog.set_details)
+        
+        self.analysis_worker.deleteLater()
+        self.processing_thread.deleteLater()
+        self.analysis_worker = None
+        self.processing_thread = None
+        self.analysis_dialog = None
+        
+        self.analyze_btn.setEnabled(True)
+        self.load_btn.setEnabled(True)
+        
     def show_sciatic_summary(self):
         """Показать сводку седалищного индекса"""
         if self.results_df.empty:
@@ -1348,6 +1593,10 @@ CSV файл: {Path(self.csv_path).name}
             self.results_df.to_csv(file_path, index=False)
             scale = self.analysis_core.get_pixel_to_mm_scale()
             
+            # Примененные пороги бинаризации — рядом с результатами
+            thresholds_path = Path(file_path).with_name(f"{Path(file_path).stem}_thresholds.csv")
+            self.analysis_core.threshold_table().to_csv(thresholds_path, index=False)
+            
             # Подсчитываем количество измерений седалищного индекса
             sciatic_columns = [col for col in self.results_df.columns if 'sciatic_index' in col]
             total_sciatic_measurements = 0
@@ -1355,13 +1604,23 @@ CSV файл: {Path(self.csv_path).name}
                 total_sciatic_measurements += (self.results_df[col] > 0).sum()
             
             QMessageBox.information(self, "Успех", 
-                f"Результаты сохранены в:\n{file_path}\n\n"
+                f"Результаты сохранены в:\n{file_path}\n"
+                f"Пороги бинаризации: {thresholds_path.name}\n\n"
                 f"Масштаб: {scale:.3f} мм/пиксель\n"
                 f"Все линейные размеры в мм, площади в мм²\n"
                 f"Седалищный индекс: {total_sciatic_measurements} измерений")
             
     def closeEvent(self, event):
         """Обработка закрытия приложения"""
+        self.frame_update_timer.stop()
+        self.render_thread.quit()
+        self.render_thread.wait()
+        
+        if self.processing_thread is not None:
+            self.analysis_core.request_cancel()
+            self.processing_thread.quit()
+            self.processing_thread.wait()
+            
         if self.analysis_core:
             self.analysis_core.close()
         event.accept()
@@ -0,0 +1,189 @@
+"""
+parallel_analysis.py
+"""
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+from frame_source import SequentialFrameReader
+from paw_area import PawAreaAnalyzer, OtsuThresholdTracker
+from result_buffer import ResultBuffer
+
+
+def raw_area_buffer(paw_names, capacity):
+    """
+    Буфер сырых площадей: 'frame', '{лапа}_area_px' и '{лапа}_threshold' —
+    примененный порог бинаризации (NaN — площадь не измерялась)
+    """
+    columns = (['frame'] + [f'{paw_name}_area_px' for paw_name in paw_names]
+               + [f'{paw_name}_threshold' for paw_name in paw_names])
+    return ResultBuffer(columns, capacity, dtypes={'frame': np.int64}, fill_value=np.nan)
+
+
+def split_frame_ranges(frame_indices, n_chunks, align_frames=None):
+    """
+    Разбиение возрастающего списка кадров на непрерывные диапазоны
+    
+    При align_frames диапазоны режутся только перед кадрами нового сегмента
+    (номер // align_frames меняется), ближе всего к равным долям; диапазонов
+    может получиться меньше n_chunks.
+    """
+    frame_indices = np.asarray(frame_indices, dtype=np.intp)
+    n_chunks = max(1, min(n_chunks, len(frame_indices)))
+    if not align_frames:
+        return [chunk for chunk in np.array_split(frame_indices, n_chunks) if len(chunk)]
+        
+    segment_starts = np.flatnonzero(np.diff(frame_indices // align_frames)) + 1
+    if not len(segment_starts):
+        return [frame_indices] if len(frame_indices) else []
+    targets = np.linspace(0, len(frame_indices), n_chunks + 1)[1:-1]
+    nearest = np.abs(segment_starts[None, :] - targets[:, None]).argmin(axis=1)
+    return np.split(frame_indices, np.unique(segment_starts[nearest]))
+
+
+def analyze_frame_range(task):
+    """
+    Обработчик диапазона кадров в отдельном процессе
+    
+    Процесс открывает собственный VideoCapture и получает срез индекса
+    прямоугольников лап только для своего диапазона.
+    
+    Returns:
+        dict: столбцы raw_area_buffer в порядке кадров
+    """
+    frame_indices = task['frame_indices']
+    bboxes = task['bboxes']
+    bbox_valid = task['bbox_valid']
+    first_frame = task['first_frame']
+    
+    paw_names = task['paw_names']
+    
+    analyzer = PawAreaAnalyzer()
+    reader = SequentialFrameReader(task['video_path'])
+    buffer = raw_area_buffer(paw_names, len(frame_indices))
+    area_columns = [(paw_name, buffer[f'{paw_name}_area_px'], buffer[f'{paw_name}_threshold'])
+                    for paw_name in paw_names]
+    
+    # Повторное использование порога Otsu: диапазон состоит из целых сегментов трекера
+    otsu_tracker = OtsuThresholdTracker(*task['otsu_reuse']) if task['otsu_reuse'] else None
+    
+    frame_areas = analyzer.iter_frame_areas(
+        reader.iter_frames(frame_indices), bboxes, bbox_valid, paw_names,
+        task['threshold_value'], task['filters'],
+        atlas_frames=task['atlas_frames'], first_frame=first_frame, otsu_tracker=otsu_tracker
+    )
+    
+    try:
+        for frame_idx, areas, thresholds in frame_areas:
+            row = buffer.add_row()
+            buffer['frame'][row] = frame_idx
+            for paw_name, column, threshold_column in area_columns:
+                if areas[paw_name] is not None:
+                    column[row] = areas[paw_name]
+                if paw_name in thresholds:
+                    threshold_column[row] = thresholds[paw_name]
+    finally:
+        reader.close()
+        
+    return buffer.as_dict()
+
+
+def run_parallel_analysis(video_path, bbox_index, frame_indices, paw_names,
+                          threshold_value, filters=None, n_workers=None, atlas_frames=0,
+                          otsu_reuse=None, chunks_per_worker=4, progress_callback=None, should_cancel=None,
+                          chunk_callback=None):
+    """
+    Многопроцессный расчет площадей по непрерывным диапазонам кадров
+    
+    Args:
+        video_path: путь к видео
+        bbox_index: пара (прямоугольники, маска) для всех кадров сеанса
+                    (AnalysisEngine.paw_bboxes)
+        frame_indices: возрастающий список кадров для анализа
+        paw_names: имена лап в порядке индекса
+        n_workers: число процессов (по умолчанию — число ядер)
+        atlas_frames: число кадров на атлас ROI (см. PawAreaAnalyzer.iter_frame_areas)
+        otsu_reuse: (check_frames, tolerance, segment_frames) для OtsuThresholdTracker
+                    или None; диапазоны режутся по границам сегментов
+        chunks_per_worker: число диапазонов на процесс (для плавного прогресса)
+        progress_callback: функция прогресса (0-100)
+        should_cancel: функция без аргументов; True прерывает анализ
+        chunk_callback: функция, получающая столбцы каждого готового диапазона
+                        (например, для потоковой записи на диск)
+        
+    Returns:
+        ResultBuffer: площади лап в порядке кадров или None, если анализ был отменен
+    """
+    if n_workers is None or n_workers <= 0:
+        n_workers = os.cpu_count() or 1
+        
+    chunks = split_frame_ranges(frame_indices, n_workers * chunks_per_worker,
+                                align_frames=otsu_reuse[2] if otsu_reuse else None)
+    total = sum(len(chunk) for chunk in chunks)
+    
+    bboxes, bbox_valid = bbox_index
+    
+    tasks = []
+    for chunk in chunks:
+        first_frame, last_frame = int(chunk[0]), int(chunk[-1])
+        tasks.append({
+            'video_path': video_path,
+            'frame_indices': chunk.tolist(),
+            'first_frame': first_frame,
+            'bboxes': np.ascontiguousarray(bboxes[first_frame:last_frame + 1]),
+            'bbox_valid': np.ascontiguousarray(bbox_valid[first_frame:last_frame + 1]),
+            'paw_names': list(paw_names),
+            'threshold_value': threshold_value,
+            'filters': filters,
+            'atlas_frames': atlas_frames,
+            'otsu_reuse': otsu_reuse
+        })
+        
+    chunk_results = [None] * len(tasks)
+    done = 0
+    
+    # spawn: процессы не наследуют состояние GUI родителя
+    context = multiprocessing.get_context('spawn')
+    executor = ProcessPoolExecutor(max_workers=n_workers, mp_context=context)
+    pending = set()
+    all_done = False
+    try:
+        futures = {executor.submit(analyze_frame_range, task): i for i, task in enumerate(tasks)}
+        pending = set(futures)
+        
+        while pending:
+            # Короткий таймаут, чтобы отмена срабатывала без ожидания целого диапазона
+            completed, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            
+            if should_cancel and should_cancel():
+                return None
+                
+            for future in completed:
+                i = futures[future]
+                chunk_results[i] = future.result()
+                done += len(tasks[i]['frame_indices'])
+                
+                if chunk_callback:
+                    chunk_callback(chunk_results[i])
+                
+                if progress_callback:
+                    progress_callback(done / total * 100)
+                    
+        all_done = True
+    finally:
+        if not all_done:
+            # Отмена или ошибка: еще не начатые диапазоны снимаются явно
+            # (cancel_futures не срабатывает, если исполнитель уже удален
+            # сборщиком мусора), выполняющиеся не ждем
+            for future in pending:
+                future.cancel()
+        executor.shutdown(wait=all_done, cancel_futures=not all_done)
+        
+    # Диапазоны непрерывны и упорядочены, поэтому склейка сохраняет порядок кадров
+    buffer = raw_area_buffer(paw_names, total)
+    for chunk in chunk_results:
+        buffer.extend(chunk)
+    return buffer
@@ -0,0 +1,857 @@
+"""
+paw_area.py
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+
+# Минимальное число достоверных точек, при котором лапа анализируется
+MIN_PAW_POINTS = 3
+
+# Бэкенды статистики компонентов маски (см. PawAreaAnalyzer.analyze_components)
+COMPONENT_BACKENDS = ('contours', 'stats')
+
+# Структурные элементы создаются один раз на процесс; 'contact' — ядро 3x3
+# очистки маски контакта (то же, что np.ones((3, 3), np.uint8))
+MORPHOLOGY_KERNELS = {
+    'contact': cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3)),
+    'small': cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)),
+    'medium': cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5)),
+    'large': cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (7, 7))
+}
+
+
+def paw_bboxes(data, valid, paw_part_indices, frame_shape, padding=15,
+               min_points=MIN_PAW_POINTS):
+    """
+    Ограничивающие прямоугольники точек всех лап для блока кадров (векторно):
+    достоверные точки лапы с отступом padding, обрезанные по кадру
+    
+    Args:
+        data: координаты (кадры, части тела, [x, y, likelihood])
+        valid: маска достоверности (кадры, части тела)
+        paw_part_indices: индексы точек каждой лапы
+        frame_shape: размер кадра (высота, ширина, ...)
+        
+    Returns:
+        tuple: (int32 (кадры, лапы, 4) — [x_min, y_min, x_max, y_max],
+                bool (кадры, лапы) — у лапы не меньше min_points точек)
+    """
+    n_frames = len(data)
+    bboxes = np.zeros((n_frames, len(paw_part_indices), 4), dtype=np.int32)
+    bbox_valid = np.zeros((n_frames, len(paw_part_indices)), dtype=np.bool_)
+    limits = np.array([frame_shape[1], frame_shape[0]], dtype=np.float64)
+    
+    for i, part_indices in enumerate(paw_part_indices.values()):
+        points = data[:, part_indices, :2].astype(np.float64)
+        mask = valid[:, part_indices, None]
+        ok = valid[:, part_indices].sum(axis=1) >= min_points
+        
+        with np.errstate(invalid='ignore'):
+            low = np.where(mask, points, np.inf).min(axis=1)
+            high = np.where(mask, points, -np.inf).max(axis=1)
+            # Дробная часть отбрасывается (np.trunc), как при приведении к int
+            low = np.maximum(0, np.trunc(low[ok] - padding))
+            high = np.minimum(limits, np.trunc(high[ok] + padding))
+            
+        bboxes[ok, i, :2] = low
+        bboxes[ok, i, 2:] = high
+        bbox_valid[:, i] = ok
+        
+    return bboxes, bbox_valid
+
+
+# Фильтры по умолчанию: набор этапов эталонного конвейера (paw_contact_analyzer)
+DEFAULT_FILTERS = {
+    'gaussian_blur': True,
+    'median_blur': False,
+    'clahe': False,
+    'morphology': True,
+    'noise_reduction': True
+}
+
+
+class PreprocessingPipeline:
+    """Скомпилированный конвейер обработки ROI по словарю filters.
+    
+    Строится один раз на набор фильтров (compile_pipeline) и содержит
+    только включенные этапы с заранее созданными ядрами и объектом CLAHE:
+    
+        gaussian_blur   — размытие Гаусса 5x5
+        median_blur     — медианный фильтр 3x3
+        clahe           — выравнивание контраста CLAHE
+        (порог: ручной или Otsu)
+        morphology      — морфологическое закрытие (заполнение отверстий)
+        noise_reduction — морфологическое открытие (удаление шума)
+        
+    Экземпляр не изменяется после создания и общий для интерактивного
+    просмотра и полного анализа; CLAHE у каждого потока свой.
+    """
+    
+    def __init__(self, filters=None):
+        self.key = self.filters_key(filters)
+        self.filters = dict(self.key)
+        self.kernel = MORPHOLOGY_KERNELS['contact']
+        self._local = threading.local()
+        
+        # Этапы до порога: функции (src, dst)
+        self.stages = []
+        if self.filters['gaussian_blur']:
+            self.stages.append(('gaussian_blur', self._gaussian_blur))
+        if self.filters['median_blur']:
+            self.stages.append(('median_blur', self._median_blur))
+        if self.filters['clahe']:
+            self.stages.append(('clahe', self._clahe))
+            
+        # Морфология после порога
+        self.morphology_ops = []
+        if self.filters['morphology']:
+            self.morphology_ops.append(cv2.MORPH_CLOSE)
+        if self.filters['noise_reduction']:
+            self.morphology_ops.append(cv2.MORPH_OPEN)
+            
+        # Медианный фильтр (граница BORDER_REPLICATE) и CLAHE (тайлы по всему
+        # изображению) зависят от размера ROI, поэтому в атлас не укладываются
+        self.atlas_compatible = all(name == 'gaussian_blur' for name, _ in self.stages)
+        
+    @staticmethod
+    def filters_key(filters):
+        """Хешируемый ключ полного набора фильтров (недостающие — по умолчанию)"""
+        filters = {**DEFAULT_FILTERS, **(filters or {})}
+        return tuple(sorted((name, bool(value)) for name, value in filters.items()))
+        
+    def __repr__(self):
+        enabled = [name for name, value in self.key if value]
+        return f"PreprocessingPipeline({', '.join(enabled)})"
+        
+    @staticmethod
+    def _gaussian_blur(src, dst):
+        cv2.GaussianBlur(src, (5, 5), 0, dst=dst)
+        
+    @staticmethod
+    def _median_blur(src, dst):
+        cv2.medianBlur(src, 3, dst=dst)
+        
+    def _clahe(self, src, dst):
+        clahe = getattr(self._local, 'clahe', None)
+        if clahe is None:
+            clahe = self._local.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        clahe.apply(src, dst=dst)
+        
+    def filter(self, gray, buffers=None):
+        """
+        Этапы до порога для изображения в оттенках серого
+        
+        Args:
+            buffers: два буфера размера gray для промежуточных результатов
+                     (если не заданы, выделяются)
+            
+        Returns:
+            np.ndarray: результат (сам gray, если этапов нет)
+        """
+        if buffers is None:
+            buffers = (np.empty_like(gray), np.empty_like(gray))
+        image = gray
+        for _, stage in self.stages:
+            dst = buffers[1] if image is buffers[0] else buffers[0]
+            stage(image, dst)
+            image = dst
+        return image
+        
+    @staticmethod
+    def threshold(image, threshold_value, dst=None):
+        """
+        Порог: ручной (0-255), Otsu (-1) или функция от изображения после
+        фильтров, возвращающая порог (см. OtsuThresholdTracker.resolver)
+        
+        Returns:
+            tuple: (примененный порог, бинарная маска)
+        """
+        if callable(threshold_value):
+            threshold_value = threshold_value(image)
+            
+        if threshold_value == -1:
+            # Автоматический метод Otsu (как в paw_contact_analyzer)
+            return cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=dst)
+        # Ручной порог (как в paw_contact_analyzer)
+        return cv2.threshold(image, threshold_value, 255, cv2.THRESH_BINARY, dst=dst)
+        
+    def morphology(self, binary, work=None):
+        """
+        Включенные морфологические этапы
+        
+        Результат пишется попеременно в binary и work, поэтому возвращается
+        тот из них, где оказалась итоговая маска.
+        """
+        if work is None and self.morphology_ops:
+            work = np.empty_like(binary)
+        image = binary
+        for op in self.morphology_ops:
+            dst = work if image is binary else binary
+            cv2.morphologyEx(image, op, self.kernel, dst=dst)
+            image = dst
+        return image
+
+
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+
+
+def compile_pipeline(filters=None):
+    """
+    Скомпилированный конвейер для словаря filters
+    
+    Конвейеры кэшируются по набору фильтров, поэтому повторные вызовы
+    с теми же настройками дешевы; готовый PreprocessingPipeline
+    возвращается как есть.
+    """
+    if isinstance(filters, PreprocessingPipeline):
+        return filters
+        
+    key = PreprocessingPipeline.filters_key(filters)
+    pipeline = _pipelines.get(key)
+    if pipeline is None:
+        with _pipelines_lock:
+            pipeline = _pipelines.setdefault(key, PreprocessingPipeline(dict(key)))
+    return pipeline
+
+
+class RoiProcessor:
+    """Конвейер бинаризации ROI без выделения памяти на каждый вызов.
+    
+    Оттенки серого, этапы PreprocessingPipeline, порог и морфология
+    пишутся через dst= в заранее выделенные буферы, которые растут только
+    при появлении ROI большего размера. Возвращаемая маска — представление
+    буфера и действительна до следующего вызова, поэтому у каждого потока
+    или процесса должен быть свой экземпляр.
+    """
+    
+    def __init__(self):
+        self._capacity = 0
+        self._buffers = ()
+        # Порог, примененный при последнем вызове binarize
+        self.threshold = None
+        
+    def _scratch(self, height, width):
+        """Буферы gray, двух промежуточных изображений, binary и work нужного размера"""
+        size = height * width
+        if size > self._capacity:
+            self._capacity = max(size, 2 * self._capacity)
+            self._buffers = tuple(np.empty(self._capacity, dtype=np.uint8) for _ in range(5))
+        return [buffer[:size].reshape(height, width) for buffer in self._buffers]
+        
+    def binarize(self, roi, threshold_value, pipeline=None):
+        """
+        Бинарная маска контакта (0/255) для ROI (BGR или оттенки серого)
+        
+        threshold_value — как в PreprocessingPipeline.threshold; примененный
+        порог сохраняется в self.threshold.
+        """
+        pipeline = compile_pipeline(pipeline)
+        gray, first, second, binary, work = self._scratch(roi.shape[0], roi.shape[1])
+        
+        if roi.ndim == 3:
+            cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY, dst=gray)
+        else:
+            gray = roi
+            
+        filtered = pipeline.filter(gray, (first, second))
+        self.threshold, _ = pipeline.threshold(filtered, threshold_value, dst=binary)
+        return pipeline.morphology(binary, work)
+        
+    def area(self, roi, threshold_value, pipeline=None):
+        """Площадь контакта в пикселях (маска содержит только 0 и 255)"""
+        return cv2.countNonZero(self.binarize(roi, threshold_value, pipeline))
+
+
+class RoiAtlas:
+    """Бинаризация нескольких ROI за один проход по общему изображению-атласу.
+    
+    ROI укладываются в атлас полками слева направо, каждый — с защитной
+    рамкой. Рамка заполняется отражением краев ROI (как граница
+    BORDER_REFLECT_101 у GaussianBlur), а перед каждым расширением
+    и сужением — нулями и 255 соответственно (как граница morphologyEx
+    по умолчанию). Поэтому размытие, порог и морфология вызываются один раз
+    на атлас, а маска каждого ROI совпадает с маской RoiProcessor.
+    Порог Otsu по-прежнему считается для каждого ROI отдельно.
+    Подходит только для конвейеров с atlas_compatible.
+    
+    Маски — представления буферов атласа и действительны до следующего
+    вызова binarize, поэтому у каждого потока должен быть свой экземпляр.
+    """
+    
+    # Ширина полки атласа в пикселях (шире — только если этого требует один ROI)
+    SHELF_WIDTH = 1024
+    
+    def __init__(self):
+        self._capacity = 0
+        self._buffers = ()
+        # Пороги ROI, примененные при последнем вызове binarize
+        self.thresholds = []
+        
+    def _layout(self, rois, guard):
+        """Левые верхние углы ROI с рамкой и размер атласа (высота, ширина)"""
+        border = 2 * guard
+        shelf_width = max([self.SHELF_WIDTH] + [roi.shape[1] + border for roi in rois])
+        
+        origins = []
+        x = y = shelf_height = width = 0
+        for roi in rois:
+            h, w = roi.shape[0] + border, roi.shape[1] + border
+            if x + w > shelf_width:
+                x, y, shelf_height = 0, y + shelf_height, 0
+            origins.append((y, x))
+            x += w
+            shelf_height = max(shelf_height, h)
+            width = max(width, x)
+            
+        return origins, y + shelf_height, width
+        
+    def _scratch(self, height, width):
+        """Буферы color, gray, blurred, binary, work, interior, exterior нужного размера"""
+        size = height * width
+        if size > self._capacity:
+            self._capacity = max(size, 2 * self._capacity)
+            self._buffers = (np.empty(3 * self._capacity, dtype=np.uint8),) + tuple(
+                np.empty(self._capacity, dtype=np.uint8) for _ in range(6)
+            )
+        color = self._buffers[0][:3 * size].reshape(height, width, 3)
+        return [color] + [buffer[:size].reshape(height, width) for buffer in self._buffers[1:]]
+        
+    def binarize(self, rois, threshold_value, pipeline=None):
+        """
+        Бинарные маски контакта (0/255) для списка ROI
+        
+        Args:
+            rois: непустые ROI одного типа (все BGR или все в оттенках серого)
+            threshold_value: порог 0-255, -1 (Otsu для каждого ROI) или список
+                             порогов по ROI (как в PreprocessingPipeline.threshold)
+            pipeline: конвейер или словарь фильтров (см. compile_pipeline)
+            
+        Returns:
+            list: маски в порядке rois
+        """
+        pipeline = compile_pipeline(pipeline)
+        if not pipeline.atlas_compatible:
+            raise ValueError(f"Конвейер нельзя выполнить атласом: {pipeline}")
+        self.thresholds = []
+        if not rois:
+            return []
+            
+        # Рамка покрывает радиус размытия 5x5 и радиус структурного элемента
+        g = max(2, max(pipeline.kernel.shape) // 2)
+        origins, height, width = self._layout(rois, g)
+        color, gray, blurred, binary, work, interior, exterior = self._scratch(height, width)
+        
+        # --- 1. Укладка ROI с отраженной рамкой ---
+        canvas = color if rois[0].ndim == 3 else gray
+        interior.fill(0)
+        inner = []
+        for roi, (y, x) in zip(rois, origins):
+            h, w = roi.shape[:2]
+            cv2.copyMakeBorder(roi, g, g, g, g, cv2.BORDER_REFLECT_101,
+                               dst=canvas[y:y + h + 2 * g, x:x + w + 2 * g])
+            inner.append((slice(y + g, y + g + h), slice(x + g, x + g + w)))
+            interior[inner[-1]] = 255
+        cv2.bitwise_not(interior, dst=exterior)
+        
+        # --- 2. Оттенки серого, размытие и порог одним вызовом на атлас ---
+        if canvas is color:
+            cv2.cvtColor(color, cv2.COLOR_BGR2GRAY, dst=gray)
+        filtered = pipeline.filter(gray, (blurred, work))
+        
+        if isinstance(threshold_value, (list, tuple)) or threshold_value == -1:
+            # Порог своего ROI: Otsu или значение из списка
+            if not isinstance(threshold_value, (list, tuple)):
+                threshold_value = [threshold_value] * len(inner)
+            for region, roi_threshold in zip(inner, threshold_value):
+                used, _ = pipeline.threshold(filtered[region], roi_threshold, dst=binary[region])
+                self.thresholds.append(used)
+        else:
+            pipeline.threshold(filtered, threshold_value, dst=binary)
+            self.thresholds = [float(threshold_value)] * len(inner)
+            
+        # --- 3. Закрытие и открытие: рамка 0 перед расширением, 255 перед сужением ---
+        kernel = pipeline.kernel
+        for op in pipeline.morphology_ops:
+            if op == cv2.MORPH_CLOSE:
+                cv2.bitwise_and(binary, interior, dst=binary)
+                cv2.dilate(binary, kernel, dst=work)
+                cv2.bitwise_or(work, exterior, dst=work)
+                cv2.erode(work, kernel, dst=binary)
+            else:
+                cv2.bitwise_or(binary, exterior, dst=binary)
+                cv2.erode(binary, kernel, dst=work)
+                cv2.bitwise_and(work, interior, dst=work)
+                cv2.dilate(work, kernel, dst=binary)
+                
+        return [binary[region] for region in inner]
+
+
+class OtsuThresholdTracker:
+    """Повторное использование порога Otsu лапы на соседних кадрах.
+    
+    Порог каждой лапы считается методом Otsu и дальше применяется как
+    ручной. Не чаще одного раза в check_frames кадров строится гистограмма
+    ROI лапы (после фильтров): если ее отличие от гистограммы, по которой
+    был посчитан порог (полусумма модулей разностей долей, 0-1), больше
+    tolerance, порог пересчитывается. На кадрах пересчета результат
+    совпадает с обычным Otsu.
+    
+    Состояние сбрасывается на границах сегментов по segment_frames кадров
+    (номера кадров, кратные segment_frames). Порог кадра зависит только от
+    обработанных кадров его сегмента, поэтому результат не зависит от
+    разбиения видео на диапазоны, если они режутся по границам сегментов
+    (split_frame_ranges), и от продолжения прерванного анализа.
+    """
+    
+    def __init__(self, check_frames=15, tolerance=0.1, segment_frames=240):
+        self.check_frames = check_frames
+        self.tolerance = tolerance
+        self.segment_frames = segment_frames
+        self.checks = 0
+        self.recomputed = 0
+        self._state = {}
+        
+    def resolver(self, paw_name, frame_idx):
+        """Функция порога для ROI лапы в кадре (для PreprocessingPipeline.threshold)"""
+        return lambda image: self.threshold(paw_name, frame_idx, image)
+        
+    def frame_thresholds(self, frame_idx, paw_names):
+        """Функции порога всех лап кадра"""
+        return {paw_name: self.resolver(paw_name, frame_idx) for paw_name in paw_names}
+        
+    def threshold(self, paw_name, frame_idx, image):
+        """Порог лапы: сохраненный или пересчитанный при дрейфе гистограммы"""
+        segment = frame_idx // self.segment_frames
+        state = self._state.get(paw_name)
+        if state is not None and state['segment'] != segment:
+            # Новый сегмент начинается без сохраненного порога
+            state = None
+        if state is not None and 0 <= frame_idx - state['checked'] < self.check_frames:
+            return state['threshold']
+            
+        self.checks += 1
+        hist = cv2.calcHist([image], [0], None, [256], [0, 256]).ravel() / image.size
+        
+        if state is None or 0.5 * np.abs(hist - state['hist']).sum() > self.tolerance:
+            threshold, _ = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            state = self._state[paw_name] = {'threshold': threshold, 'hist': hist, 'segment': segment}
+            self.recomputed += 1
+            
+        state['checked'] = frame_idx
+        return state['threshold']
+
+
+class PawAreaAnalyzer:
+    """Анализ контактной области лапы в ROI кадра.
+    
+    Не зависит от Qt и состояния видео, поэтому один и тот же код
+    используется в интерактивном режиме и в процессах-обработчиках.
+    Буферы RoiProcessor и RoiAtlas у каждого потока свои.
+    """
+    
+    def __init__(self, component_backend='contours'):
+        self.component_backend = component_backend
+        self._local = threading.local()
+        
+    def processor(self):
+        """RoiProcessor текущего потока"""
+        processor = getattr(self._local, 'processor', None)
+        if processor is None:
+            processor = self._local.processor = RoiProcessor()
+        return processor
+        
+    def atlas(self):
+        """RoiAtlas текущего потока"""
+        atlas = getattr(self._local, 'atlas', None)
+        if atlas is None:
+            atlas = self._local.atlas = RoiAtlas()
+        return atlas
+        
+    def __getstate__(self):
+        return {'component_backend': self.component_backend}
+        
+    def __setstate__(self, state):
+        self.component_backend = state.get('component_backend', 'contours')
+        self._local = threading.local()
+        
+    def analyze(self, frame, bbox, threshold_value, filters=None, render=True,
+                component_backend=None, shape_metrics=True):
+        """
+        Бинаризация ROI лапы и подсчет контактной площади в пикселях
+        
+        Этап расчета (segment, площадь, метрики компонентов) отделен от этапа
+        визуализации (render): при render=False изображение не строится,
+        и вместо него возвращается None. component_backend и shape_metrics
+        передаются в analyze_components.
+        """
+        roi, binary = self.segment(frame, bbox, threshold_value, filters)
+        if binary is None:
+            return 0, np.zeros((100, 100, 3), dtype=np.uint8), {}
+        
+        # --- 3. Подсчет белых пикселей (контактная область) ---
+        # Маска содержит только 0 и 255, поэтому countNonZero == np.sum(binary == 255)
+        contact_area_px = cv2.countNonZero(binary)
+        
+        # --- 4. Дополнительный анализ компонентов для расширенных метрик ---
+        analysis_results = self.analyze_components(
+            binary, contact_area_px, component_backend, shape_metrics
+        )
+        
+        # --- 5. Создание визуализации ---
+        visualization_image = self.render(roi, binary) if render else None
+        
+        # --- 6. Возврат результатов ---
+        return contact_area_px, visualization_image, analysis_results
+        
+    def measure(self, frame, bbox, threshold_value, filters=None):
+        """Только площадь контакта в пикселях: без метрик компонентов и визуализации"""
+        roi = self.crop_roi(frame, bbox)
+        if roi is None:
+            return 0
+        return self.processor().area(roi, threshold_value, filters)
+        
+    def segment(self, frame, bbox, threshold_value, filters=None):
+        """
+        Этап расчета: ROI лапы (представление кадра) и ее бинарная маска
+        
+        Маска — буфер RoiProcessor текущего потока: она действительна
+        до следующего вызова segment/measure в этом потоке.
+        
+        Returns:
+            tuple: (roi, binary) или (None, None), если ROI пуст
+        """
+        # --- 1. Подготовка области интереса (ROI) ---
+        roi = self.crop_roi(frame, bbox)
+        if roi is None:
+            return None, None
+        
+        # --- 2. Обработка изображения (по умолчанию точно как в paw_contact_analyzer.py) ---
+        # Оттенки серого -> включенные фильтры -> порог (ручной или Otsu) ->
+        # морфологическое закрытие и открытие ядром 3x3 (см. PreprocessingPipeline)
+        return roi, self.processor().binarize(roi, threshold_value, filters)
+        
+    @staticmethod
+    def crop_roi(frame, bbox):
+        """ROI лапы как представление кадра (None, если прямоугольник пуст)"""
+        if bbox is None or len(bbox) != 4:
+            return None
+
+        x_min, y_min, x_max, y_max = bbox
+        x_min, y_min = max(0, x_min), max(0, y_min)
+        x_max, y_max = min(frame.shape[1], x_max), min(frame.shape[0], y_max)
+
+        if x_min >= x_max or y_min >= y_max:
+            return None
+
+        roi = frame[y_min:y_max, x_min:x_max]
+        if roi.size == 0:
+            return None
+        return roi
+        
+    def render(self, roi, binary):
+        """Этап визуализации: ROI с контактной областью, выделенной желтым"""
+        # Создаем цветную версию бинарного изображения для отображения
+        if roi.shape[0] > 0 and roi.shape[1] > 0:
+            # Создаем трехканальную версию оригинального ROI
+            original_roi_color = roi.copy() if len(roi.shape) == 3 else cv2.cvtColor(roi, cv2.COLOR_GRAY2BGR)
+            
+            # Создаем цветную маску для контактной области
+            color_mask = np.zeros_like(original_roi_color)
+            color_mask[binary == 255] = (0, 255, 255)  # Желтый цвет (BGR)
+            
+            # Комбинируем оригинал с маской
+            return cv2.addWeighted(color_mask, 0.4, original_roi_color, 0.6, 0)
+        return np.zeros((100, 100, 3), dtype=np.uint8)
+        
+    def analyze_components(self, binary_image, contact_area=None, backend=None,
+                           shape_metrics=True):
+        """
+        Статистика компонентов бинарной маски
+        
+        Args:
+            contact_area: уже посчитанная площадь маски (иначе считается здесь)
+            backend: 'contours' — findContours по внешним контурам, 'stats' —
+                     connectedComponentsWithStats за один проход (по умолчанию
+                     self.component_backend)
+            shape_metrics: считать периметр и солидность крупнейшего компонента
+            
+        Бэкенды могут расходиться: 'contours' выбирает крупнейший компонент по
+        площади контура и не видит компоненты внутри отверстий других,
+        'stats' выбирает по числу пикселей и считает все 8-связные компоненты.
+        """
+        if backend is None:
+            backend = self.component_backend
+        if backend not in COMPONENT_BACKENDS:
+            raise ValueError(f"Неизвестный бэкенд статистики компонентов: {backend}")
+
+        # 1. Главное: считаем площадь как количество белых пикселей (как в paw_contact_analyzer);
+        # если площадь уже посчитана, повторно маска не обходится
+        if contact_area is None:
+            contact_area = cv2.countNonZero(binary_image)
+
+        # 2. Инициализируем словарь с результатами
+        analysis_results = {
+            'total_area': contact_area,
+            'num_components': 0,
+            'largest_area_px': 0,
+            'bbox_px': None,
+            'perimeter_px': 0,
+            'length_px': 0,
+            'width_2_4_px': 0,
+            'width_1_5_px': 0,
+            'aspect_ratio': 0,
+            'solidity': 0,
+            'eccentricity': 0,
+            'key_points': []
+        }
+
+        # 3. Крупнейший компонент: его контур (для периметра и солидности),
+        # площадь и описанный прямоугольник
+        if backend == 'stats':
+            largest_contour = self._largest_component_stats(binary_image, analysis_results, shape_metrics)
+        else:
+            largest_contour = self._largest_component_contours(binary_image, analysis_results)
+
+        # 4. Если компоненты найдены, вычисляем метрики по самому большому из них
+        if analysis_results['bbox_px'] is not None:
+            # Длина (по описанному прямоугольнику) в пикселях
+            x, y, w, h = analysis_results['bbox_px']
+            analysis_results['length_px'] = max(w, h)
+            
+            # Соотношение сторон
+            if h > 0:
+                analysis_results['aspect_ratio'] = round(w / h, 2)
+
+        if shape_metrics and largest_contour is not None:
+            # Периметр в пикселях
+            perimeter_px = cv2.arcLength(largest_contour, True)
+            analysis_results['perimeter_px'] = round(perimeter_px, 2)
+
+            # Солидность (плотность)
+            hull = cv2.convexHull(largest_contour)
+            hull_area = cv2.contourArea(hull)
+            if hull_area > 0:
+                contour_area = cv2.contourArea(largest_contour)
+                analysis_results['solidity'] = round(contour_area / hull_area, 2)
+                
+        return analysis_results
+        
+    @staticmethod
+    def _largest_component_contours(binary_image, analysis_results):
+        """Бэкенд 'contours': внешние контуры, крупнейший — по площади контура"""
+        contours, _ = cv2.findContours(binary_image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        
+        analysis_results['num_components'] = len(contours)
+        if not contours:
+            return None
+            
+        # Площадь каждого контура считается один раз
+        areas = [cv2.contourArea(contour) for contour in contours]
+        largest = int(np.argmax(areas))
+        largest_contour = contours[largest]
+        
+        analysis_results['largest_area_px'] = areas[largest]
+        analysis_results['bbox_px'] = cv2.boundingRect(largest_contour)
+        return largest_contour
+        
+    @staticmethod
+    def _largest_component_stats(binary_image, analysis_results, shape_metrics):
+        """
+        Бэкенд 'stats': число компонентов, площадь и прямоугольник крупнейшего
+        за один проход connectedComponentsWithStats
+        
+        Контур крупнейшего компонента строится только при shape_metrics=True —
+        по его маске внутри описанного прямоугольника.
+        """
+        n_labels, labels, stats, _ = cv2.connectedComponentsWithStats(binary_image, connectivity=8)
+        
+        # Метка 0 — фон
+        analysis_results['num_components'] = n_labels - 1
+        if n_labels < 2:
+            return None
+            
+        largest = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+        x, y, w, h, area = (int(v) for v in stats[largest])
+        
+        analysis_results['largest_area_px'] = area
+        analysis_results['bbox_px'] = (x, y, w, h)
+        if not shape_metrics:
+            return None
+            
+        # Единственный компонент совпадает с маской — метки не сравниваются
+        if n_labels == 2:
+            component = binary_image[y:y + h, x:x + w]
+        else:
+            component = np.equal(labels[y:y + h, x:x + w], largest).view(np.uint8)
+            
+        # У одного 8-связного компонента ровно один внешний контур
+        contours, _ = cv2.findContours(component, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        return contours[0]
+        
+    def measure_frame(self, frame, frame_bboxes, frame_bbox_valid, paw_names,
+                      threshold_value, filters=None, thresholds=None):
+        """
+        Площади контакта всех лап одного кадра
+        
+        Args:
+            frame: изображение кадра
+            frame_bboxes: прямоугольники лап кадра (лапы, 4) из paw_bboxes
+            frame_bbox_valid: маска лап, которые нужно анализировать
+            paw_names: имена лап в порядке строк frame_bboxes
+            threshold_value: порог для всех лап или словарь порогов по лапам
+                             (значения — как в PreprocessingPipeline.threshold)
+            thresholds: словарь, в который записываются примененные пороги
+            
+        Returns:
+            dict: площадь в пикселях для каждой лапы (None, если точек меньше 3)
+        """
+        pipeline = compile_pipeline(filters)
+        processor = self.processor()
+        areas = {}
+        
+        for i, paw_name in enumerate(paw_names):
+            if not frame_bbox_valid[i]:
+                areas[paw_name] = None
+                continue
+                
+            roi = self.crop_roi(frame, tuple(int(v) for v in frame_bboxes[i]))
+            if roi is None:
+                areas[paw_name] = 0
+                continue
+                
+            paw_threshold = threshold_value[paw_name] if isinstance(threshold_value, dict) else threshold_value
+            areas[paw_name] = processor.area(roi, paw_threshold, pipeline)
+            if thresholds is not None:
+                thresholds[paw_name] = processor.threshold
+            
+        return areas
+        
+    def measure_frames_atlas(self, frames, frame_bboxes, frame_bbox_valid, paw_names,
+                             threshold_values, filters=None, frame_thresholds=None):
+        """
+        Площади контакта всех лап нескольких кадров через один атлас (RoiAtlas)
+        
+        Результат совпадает с measure_frame для каждого кадра. Конвейеры,
+        которые нельзя выполнить атласом (медианный фильтр, CLAHE),
+        обрабатываются по одному ROI.
+        
+        Args:
+            frames: изображения кадров
+            frame_bboxes: прямоугольники лап каждого кадра (кадры, лапы, 4)
+            frame_bbox_valid: маска лап каждого кадра (кадры, лапы)
+            threshold_values: порог каждого кадра (как threshold_value в measure_frame)
+            frame_thresholds: словари по кадрам, в которые записываются примененные пороги
+            
+        Returns:
+            list: словари площадей в пикселях по кадрам (None, если точек меньше 3)
+        """
+        pipeline = compile_pipeline(filters)
+        if frame_thresholds is None:
+            frame_thresholds = [None] * len(frames)
+            
+        if not pipeline.atlas_compatible:
+            return [self.measure_frame(frame, bboxes, bbox_valid, paw_names, threshold_value,
+                                       pipeline, thresholds)
+                    for frame, bboxes, bbox_valid, threshold_value, thresholds
+                    in zip(frames, frame_bboxes, frame_bbox_valid, threshold_values, frame_thresholds)]
+            
+        frame_areas = []
+        rois, slots, roi_thresholds = [], [], []
+        
+        for frame, bboxes, bbox_valid, threshold_value, thresholds in zip(
+                frames, frame_bboxes, frame_bbox_valid, threshold_values, frame_thresholds):
+            areas = {}
+            for i, paw_name in enumerate(paw_names):
+                if not bbox_valid[i]:
+                    areas[paw_name] = None
+                    continue
+                    
+                roi = self.crop_roi(frame, tuple(int(v) for v in bboxes[i]))
+                areas[paw_name] = 0
+                if roi is not None:
+                    rois.append(roi)
+                    slots.append((areas, thresholds, paw_name))
+                    roi_thresholds.append(
+                        threshold_value[paw_name] if isinstance(threshold_value, dict) else threshold_value
+                    )
+            frame_areas.append(areas)
+            
+        # Общий для всех кадров порог (ручной или Otsu) передается в атлас как есть
+        if not any(isinstance(t, dict) for t in threshold_values) and len(set(threshold_values)) == 1:
+            roi_thresholds = threshold_values[0]
+            
+        atlas = self.atlas()
+        masks = atlas.binarize(rois, roi_thresholds, pipeline)
+        for (areas, thresholds, paw_name), binary, used in zip(slots, masks, atlas.thresholds):
+            areas[paw_name] = cv2.countNonZero(binary)
+            if thresholds is not None:
+                thresholds[paw_name] = used
+            
+        return frame_areas
+        
+    def iter_frame_areas(self, frames, bboxes, bbox_valid, paw_names, threshold_value,
+                         filters=None, atlas_frames=0, first_frame=0, otsu_tracker=None):
+        """
+        Площади лап для потока кадров
+        
+        Args:
+            frames: итератор пар (номер кадра, изображение)
+            bboxes, bbox_valid: индекс прямоугольников лап (paw_bboxes); кадру
+                                frame_idx соответствует строка frame_idx - first_frame
+            atlas_frames: 0 — каждый ROI обрабатывается отдельно (measure_frame);
+                          N > 0 — ROI каждых N кадров обрабатываются одним атласом
+                          (если его допускает конвейер фильтров)
+            otsu_tracker: OtsuThresholdTracker — при threshold_value == -1 порог
+                          Otsu лапы повторно используется на соседних кадрах
+            
+        Yields:
+            tuple: (номер кадра, словарь площадей как у measure_frame,
+                    словарь примененных порогов по лапам)
+        """
+        # Конвейер компилируется один раз на весь поток кадров
+        filters = compile_pipeline(filters)
+        
+        def frame_threshold(frame_idx):
+            if otsu_tracker is not None and threshold_value == -1:
+                return otsu_tracker.frame_thresholds(frame_idx, paw_names)
+            return threshold_value
+            
+        if atlas_frames <= 0 or not filters.atlas_compatible:
+            for frame_idx, frame in frames:
+                row = frame_idx - first_frame
+                thresholds = {}
+                areas = self.measure_frame(
+                    frame, bboxes[row], bbox_valid[row], paw_names, frame_threshold(frame_idx),
+                    filters, thresholds
+                )
+                yield frame_idx, areas, thresholds
+            return
+            
+        batch = []
+        for item in frames:
+            batch.append(item)
+            if len(batch) < atlas_frames:
+                continue
+            yield from self._measure_batch(batch, bboxes, bbox_valid, paw_names,
+                                           frame_threshold, filters, first_frame)
+            batch = []
+            
+        if batch:
+            yield from self._measure_batch(batch, bboxes, bbox_valid, paw_names,
+                                           frame_threshold, filters, first_frame)
+            
+    def _measure_batch(self, batch, bboxes, bbox_valid, paw_names, frame_threshold,
+                       filters, first_frame):
+        rows = [frame_idx - first_frame for frame_idx, _ in batch]
+        frame_thresholds = [{} for _ in batch]
+        frame_areas = self.measure_frames_atlas(
+            [frame for _, frame in batch], bboxes[rows], bbox_valid[rows], paw_names,
+            [frame_threshold(frame_idx) for frame_idx, _ in batch], filters, frame_thresholds
+        )
+        return [(frame_idx, areas, thresholds) for (frame_idx, _), areas, thresholds
+                in zip(batch, frame_areas, frame_thresholds)]
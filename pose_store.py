@@ -0,0 +1,397 @@
+"""
+pose_store.py
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+COORDS = ('x', 'y', 'likelihood')
+
+# Формат файла-кэша: сигнатура, длина заголовка JSON, заголовок,
+# выравнивание и сырые массивы координат и маски в порядке C
+CACHE_MAGIC = b'DLCPOSE2'
+CACHE_SUFFIX = '.posecache'
+CACHE_ALIGN = 64
+
+HDF5_SUFFIXES = ('.h5', '.hdf5')
+
+
+def open_pose_store(path, likelihood_threshold=0.6, bodyparts=None):
+    """
+    Хранилище координат по файлу DeepLabCut
+
+    Файлы .h5/.hdf5 читаются лениво (HDF5PoseStore), CSV — целиком
+    через файл-кэш (PoseStore.from_csv).
+
+    Args:
+        bodyparts: части тела, которые нужно загружать из HDF5 (None — все)
+    """
+    if Path(path).suffix.lower() in HDF5_SUFFIXES:
+        return HDF5PoseStore(path, likelihood_threshold, bodyparts=bodyparts)
+    return PoseStore.from_csv(path, likelihood_threshold)
+
+
+class PoseStore:
+    """Плотное хранилище координат DeepLabCut.
+
+    Координаты лежат в массиве float64 формы (кадры, части тела, 3),
+    где последняя ось — (x, y, likelihood). Строка i соответствует кадру i.
+    Точность совпадает с pandas, поэтому метрики не отличаются от расчета по таблице.
+    Маска достоверности для порога по умолчанию вычисляется один раз при загрузке.
+    """
+
+    def __init__(self, data, bodyparts, scorer, likelihood_threshold=0.6, valid=None):
+        self.data = data
+        self.bodyparts = list(bodyparts)
+        self.scorer = scorer
+        self.likelihood_threshold = likelihood_threshold
+        self.bodypart_index = {name: i for i, name in enumerate(self.bodyparts)}
+        self.n_frames = data.shape[0]
+
+        if valid is None:
+            valid = self.compute_valid(data, likelihood_threshold)
+        self.valid = valid
+
+    @classmethod
+    def from_dataframe(cls, df, likelihood_threshold=0.6):
+        """Построение хранилища из таблицы DLC с трехуровневым заголовком"""
+        scorer = df.columns.levels[0][0]
+        bodyparts = list(dict.fromkeys(df[scorer].columns.get_level_values(0)))
+
+        columns = pd.MultiIndex.from_product([[scorer], bodyparts, COORDS])
+        values = df.reindex(columns=columns).to_numpy(dtype=np.float64)
+        values = values.reshape(len(df), len(bodyparts), 3)
+
+        return cls(values, bodyparts, scorer, likelihood_threshold)
+
+    @classmethod
+    def from_csv(cls, csv_path, likelihood_threshold=0.6, use_cache=True):
+        """
+        Загрузка CSV DeepLabCut через файл-кэш рядом с ним
+
+        Кэш (<csv>.posecache) хранит координаты, маску, части тела и scorer
+        в двоичном виде и открывается через memory map. Он пересобирается,
+        если у CSV изменились размер или содержимое.
+        """
+        cache_path = Path(str(csv_path) + CACHE_SUFFIX)
+        if use_cache:
+            store = cls.load_cache(cache_path, csv_path, likelihood_threshold)
+            if store is not None:
+                return store
+
+        df = pd.read_csv(csv_path, header=[0, 1, 2], index_col=0)
+        store = cls.from_dataframe(df, likelihood_threshold)
+
+        if use_cache:
+            try:
+                store.save_cache(cache_path, csv_path)
+            except OSError:
+                # Каталог только для чтения: работаем без кэша
+                pass
+        return store
+
+    @staticmethod
+    def source_signature(path, digest=True):
+        """Размер, время изменения и (по запросу) хэш содержимого файла"""
+        stat = os.stat(path)
+        signature = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        if digest:
+            hasher = hashlib.blake2b(digest_size=16)
+            with open(path, 'rb') as source:
+                for chunk in iter(lambda: source.read(1 << 20), b''):
+                    hasher.update(chunk)
+            signature['hash'] = hasher.hexdigest()
+        return signature
+
+    def save_cache(self, cache_path, source_path):
+        """Запись файла-кэша (атомарно через временный файл)"""
+        data = np.ascontiguousarray(self.data, dtype=np.float64)
+        valid = np.ascontiguousarray(self.valid, dtype=np.bool_)
+        header = {
+            'source': self.source_signature(source_path),
+            'bodyparts': self.bodyparts,
+            'scorer': self.scorer,
+            'likelihood_threshold': self.likelihood_threshold,
+            'shape': list(data.shape)
+        }
+        header_bytes = json.dumps(header).encode('utf-8')
+        prefix = len(CACHE_MAGIC) + 4 + len(header_bytes)
+        padding = -prefix % CACHE_ALIGN
+
+        cache_path = Path(cache_path)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_path.parent, prefix=cache_path.name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as cache:
+                cache.write(CACHE_MAGIC)
+                cache.write(len(header_bytes).to_bytes(4, 'little'))
+                cache.write(header_bytes)
+                cache.write(b'\0' * padding)
+                cache.write(data.tobytes())
+                cache.write(valid.tobytes())
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load_cache(cls, cache_path, source_path, likelihood_threshold=0.6):
+        """Хранилище из файла-кэша или None, если кэш отсутствует или устарел"""
+        try:
+            with open(cache_path, 'rb') as cache:
+                if cache.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                    return None
+                header_size = int.from_bytes(cache.read(4), 'little')
+                header = json.loads(cache.read(header_size).decode('utf-8'))
+        except (OSError, ValueError):
+            return None
+
+        # Размер сверяется всегда; хэш содержимого считается, только если
+        # изменилось время модификации (например, файл скопирован заново)
+        source = header.get('source', {})
+        current = cls.source_signature(source_path, digest=False)
+        if current['size'] != source.get('size'):
+            return None
+        rebuild = False
+        if current['mtime_ns'] != source.get('mtime_ns'):
+            if cls.source_signature(source_path)['hash'] != source.get('hash'):
+                return None
+            # Содержимое то же: запоминаем новое время, чтобы следующие
+            # загрузки не пересчитывали хэш
+            source.update(current)
+            rebuild = not cls._rewrite_cache_header(cache_path, header, header_size)
+
+        shape = tuple(header['shape'])
+        prefix = len(CACHE_MAGIC) + 4 + header_size
+        offset = prefix + (-prefix % CACHE_ALIGN)
+        try:
+            data = np.memmap(cache_path, dtype=np.float64, mode='r', offset=offset, shape=shape)
+            valid = np.memmap(cache_path, dtype=np.bool_, mode='r',
+                              offset=offset + data.nbytes, shape=shape[:2])
+        except (OSError, ValueError):
+            return None
+
+        # Маска в кэше посчитана для сохраненного порога
+        if likelihood_threshold != header['likelihood_threshold']:
+            valid = None
+        store = cls(data, header['bodyparts'], header['scorer'], likelihood_threshold, valid)
+
+        if rebuild:
+            try:
+                store.save_cache(cache_path, source_path)
+            except OSError:
+                pass
+        return store
+
+    @staticmethod
+    def _rewrite_cache_header(cache_path, header, header_size):
+        """
+        Запись заголовка кэша на место прежнего
+
+        Заголовок дополняется пробелами до прежней длины, чтобы смещение
+        массивов не изменилось. Возвращает False, если он не помещается
+        или файл недоступен для записи.
+        """
+        header_bytes = json.dumps(header).encode('utf-8')
+        if len(header_bytes) > header_size:
+            return False
+        try:
+            with open(cache_path, 'r+b') as cache:
+                cache.seek(len(CACHE_MAGIC) + 4)
+                cache.write(header_bytes.ljust(header_size))
+        except OSError:
+            return False
+        return True
+
+    @staticmethod
+    def compute_valid(data, likelihood_threshold):
+        """Маска точек с достаточной достоверностью и конечными координатами"""
+        with np.errstate(invalid='ignore'):
+            return ((data[..., 2] >= likelihood_threshold)
+                    & np.isfinite(data[..., 0])
+                    & np.isfinite(data[..., 1]))
+
+    def indices(self, bodyparts):
+        """Индексы частей тела в хранилище (отсутствующие пропускаются)"""
+        return np.array([self.bodypart_index[name] for name in bodyparts
+                         if name in self.bodypart_index], dtype=np.intp)
+
+    def get(self, frame_idx, bodypart, likelihood_threshold=None):
+        """Координаты (x, y, likelihood) одной точки или None"""
+        part_idx = self.bodypart_index.get(bodypart)
+        if part_idx is None or not 0 <= frame_idx < self.n_frames:
+            return None
+
+        data, valid = self._row(frame_idx)
+        x, y, likelihood = data[part_idx]
+        if likelihood_threshold is None or likelihood_threshold == self.likelihood_threshold:
+            is_valid = valid[part_idx]
+        else:
+            is_valid = likelihood >= likelihood_threshold and np.isfinite(x) and np.isfinite(y)
+
+        if is_valid:
+            return (float(x), float(y), float(likelihood))
+        return None
+
+    def _row(self, frame_idx):
+        """Координаты и маска одного кадра"""
+        return self.data[frame_idx], self.valid[frame_idx]
+
+    def block(self, start, stop):
+        """Срез координат и маски для диапазона кадров [start, stop)"""
+        start = max(0, start)
+        stop = min(self.n_frames, stop)
+        return self.data[start:stop], self.valid[start:stop]
+
+    def take(self, frame_indices):
+        """Координаты и маска для произвольного набора кадров.
+
+        Кадры вне диапазона хранилища возвращаются как NaN с нулевой маской.
+        """
+        frame_indices = np.asarray(frame_indices, dtype=np.intp)
+        in_range = (frame_indices >= 0) & (frame_indices < self.n_frames)
+        safe = np.where(in_range, frame_indices, 0)
+
+        data = self.data[safe]
+        valid = self.valid[safe] & in_range[:, None]
+        if not in_range.all():
+            data = data.copy()
+            data[~in_range] = np.nan
+        return data, valid
+
+    def close(self):
+        """Освобождение ресурсов (файловые хранилища закрывают файл)"""
+
+
+class HDF5PoseStore(PoseStore):
+    """Ленивое хранилище координат из файла HDF5 DeepLabCut.
+
+    Файл не загружается целиком: строки читаются блоками по chunk_frames
+    кадров при первом обращении, и в памяти держится не более max_chunks
+    последних блоков. Из каждого блока сохраняются только нужные части тела.
+    Интерфейс совпадает с PoseStore, кроме атрибутов data и valid: весь
+    сеанс в памяти не держится, доступ к кадрам — через get, block и take.
+    """
+
+    def __init__(self, h5_path, likelihood_threshold=0.6, bodyparts=None, key=None,
+                 chunk_frames=4096, max_chunks=16):
+        self.h5_path = str(h5_path)
+        self.likelihood_threshold = likelihood_threshold
+        self.chunk_frames = int(chunk_frames)
+        self.max_chunks = max_chunks
+
+        self._store = None
+        self._lock = threading.Lock()
+        self._chunks = OrderedDict()
+
+        with self._lock:
+            store = self._open()
+            keys = store.keys()
+            if key is None:
+                # DeepLabCut сохраняет таблицу под ключом df_with_missing
+                key = '/df_with_missing' if '/df_with_missing' in keys else keys[0]
+            self.key = key
+
+            header = store.select(key, start=0, stop=1)
+            self.n_frames = self._count_rows(store)
+
+        self.scorer = header.columns.get_level_values(0)[0]
+        available = list(dict.fromkeys(header[self.scorer].columns.get_level_values(0)))
+        if bodyparts is not None:
+            wanted = set(bodyparts)
+            available = [name for name in available if name in wanted]
+        self.bodyparts = available
+        self.bodypart_index = {name: i for i, name in enumerate(self.bodyparts)}
+        self._columns = pd.MultiIndex.from_product([[self.scorer], self.bodyparts, COORDS])
+
+    def _open(self):
+        if self._store is None:
+            try:
+                self._store = pd.HDFStore(self.h5_path, mode='r')
+            except ImportError as e:
+                raise ImportError("Для чтения файлов HDF5 нужен пакет tables (PyTables)") from e
+        return self._store
+
+    def _count_rows(self, store):
+        storer = store.get_storer(self.key)
+        if storer.is_table:
+            return int(storer.nrows)
+        # Фиксированный формат: длина индекса таблицы
+        return int(storer.group.axis1.shape[0])
+
+    def _chunk(self, chunk_idx):
+        """Блок координат и маски (чтение из файла при промахе)"""
+        with self._lock:
+            chunk = self._chunks.get(chunk_idx)
+            if chunk is not None:
+                self._chunks.move_to_end(chunk_idx)
+                return chunk
+
+            start = chunk_idx * self.chunk_frames
+            stop = min(self.n_frames, start + self.chunk_frames)
+            df = self._open().select(self.key, start=start, stop=stop)
+
+        values = df.reindex(columns=self._columns).to_numpy(dtype=np.float64)
+        values = values.reshape(len(df), len(self.bodyparts), 3)
+
+        chunk = (values, self.compute_valid(values, self.likelihood_threshold))
+
+        with self._lock:
+            self._chunks[chunk_idx] = chunk
+            while len(self._chunks) > self.max_chunks:
+                self._chunks.popitem(last=False)
+        return chunk
+
+    def _row(self, frame_idx):
+        data, valid = self._chunk(frame_idx // self.chunk_frames)
+        offset = frame_idx % self.chunk_frames
+        return data[offset], valid[offset]
+
+    def block(self, start, stop):
+        start = max(0, start)
+        stop = min(self.n_frames, stop)
+        return self.take(np.arange(start, max(start, stop)))
+
+    def take(self, frame_indices):
+        frame_indices = np.asarray(frame_indices, dtype=np.intp)
+        in_range = (frame_indices >= 0) & (frame_indices < self.n_frames)
+
+        data = np.full((len(frame_indices), len(self.bodyparts), 3), np.nan, dtype=np.float64)
+        valid = np.zeros((len(frame_indices), len(self.bodyparts)), dtype=np.bool_)
+
+        chunk_ids = np.where(in_range, frame_indices // self.chunk_frames, -1)
+        for chunk_idx in np.unique(chunk_ids[in_range]):
+            rows = chunk_ids == chunk_idx
+            offsets = frame_indices[rows] - chunk_idx * self.chunk_frames
+            chunk_data, chunk_valid = self._chunk(int(chunk_idx))
+            data[rows] = chunk_data[offsets]
+            valid[rows] = chunk_valid[offsets]
+        return data, valid
+
+    def close(self):
+        with self._lock:
+            if self._store is not None:
+                self._store.close()
+                self._store = None
+            self._chunks.clear()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ('_store', '_lock', '_chunks'):
+            state.pop(name)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._store = None
+        self._lock = threading.Lock()
+        self._chunks = OrderedDict()
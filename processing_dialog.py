@@ -11,7 +11,7 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import (
     Qt, QTimer, QPropertyAnimation, QEasingCurve, 
     QSequentialAnimationGroup, QParallelAnimationGroup,
-    pyqtProperty, QRect, QPoint
+    pyqtProperty, QRect, QPoint, pyqtSignal
 )
 from PyQt5.QtGui import (
     QPainter, QColor, QFont, QPen, QBrush, 
@@ -214,6 +214,8 @@ class FloatingParticle(QLabel):
 class ProcessingDialog(QDialog):
     """Диалог обработки с анимированными эффектами"""
     
+    cancel_requested = pyqtSignal()
+    
     def __init__(self, parent=None, title="Обработка данных"):
         super().__init__(parent)
         self.setWindowTitle(title)
@@ -445,6 +447,7 @@ class ProcessingDialog(QDialog):
         
     def show_completion_animation(self):
         """Анимация завершения"""
+        self.is_processing = False
         self.particle_timer.stop()
         
         for i in range(12):
@@ -512,7 +515,7 @@ class ProcessingDialog(QDialog):
         
     def cancel_processing(self):
         """Отмена обработки"""
-        self.is_processing = False
+        self.request_cancel()
         self.processing_icon.setText("❌")
         self.processing_icon.setStyleSheet("font-size: 48px; color: #e74c3c;")
         self.status_label.setText("Обработка отменена")
@@ -521,8 +524,22 @@ class ProcessingDialog(QDialog):
         # Закрываем через секунду
         QTimer.singleShot(1000, self.reject)
         
+    def request_cancel(self):
+        """Сигнал отмены, если обработка еще идет (не более одного раза)"""
+        if self.is_processing:
+            self.is_processing = False
+            self.cancel_requested.emit()
+            
+    def reject(self):
+        """Закрытие клавишей Esc: незавершенная обработка отменяется"""
+        self.request_cancel()
+        super().reject()
+        
     def closeEvent(self, event):
         """Обработка закрытия диалога"""
+        # Закрытие окна во время обработки равносильно отмене
+        self.request_cancel()
+        
         # Останавливаем все таймеры
         if hasattr(self, 'particle_timer'):
             self.particle_timer.stop()
@@ -0,0 +1,70 @@
+"""
+result_buffer.py
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class ResultBuffer:
+    """Предвыделенный столбцовый буфер результатов.
+
+    Каждый столбец — отдельный массив NumPy заданного типа длиной capacity.
+    Строки заполняются по порядку, а dataframe() отдает заполненную часть
+    как DataFrame без копирования данных.
+    """
+
+    def __init__(self, columns, capacity, dtypes=None, fill_value=0.0):
+        dtypes = dtypes or {}
+        self.capacity = int(capacity)
+        self.n_rows = 0
+        self._columns = {}
+
+        for name in columns:
+            dtype = np.dtype(dtypes.get(name, np.float64))
+            fill = fill_value if dtype.kind == 'f' else 0
+            self._columns[name] = np.full(self.capacity, fill, dtype=dtype)
+
+    @property
+    def columns(self):
+        return list(self._columns.keys())
+
+    def __getitem__(self, name):
+        """Весь массив столбца (включая незаполненные строки) для записи по индексу"""
+        return self._columns[name]
+
+    def add_row(self):
+        """Резервирование следующей строки; возвращает ее индекс"""
+        if self.n_rows >= self.capacity:
+            raise IndexError("Буфер результатов переполнен")
+        row = self.n_rows
+        self.n_rows += 1
+        return row
+
+    def extend(self, columns):
+        """Добавление блока строк из словаря массивов (например, от процесса-обработчика)"""
+        n = len(next(iter(columns.values()))) if columns else 0
+        if self.n_rows + n > self.capacity:
+            raise IndexError("Буфер результатов переполнен")
+
+        for name, values in columns.items():
+            self._columns[name][self.n_rows:self.n_rows + n] = values
+        self.n_rows += n
+
+    def sort_by(self, name):
+        """Упорядочивание заполненных строк по столбцу (на месте, устойчиво)"""
+        order = np.argsort(self.column(name), kind='stable')
+        for values in self._columns.values():
+            values[:self.n_rows] = values[:self.n_rows][order]
+
+    def column(self, name):
+        """Заполненная часть столбца (представление, без копии)"""
+        return self._columns[name][:self.n_rows]
+
+    def as_dict(self):
+        """Заполненные столбцы в виде словаря представлений"""
+        return {name: values[:self.n_rows] for name, values in self._columns.items()}
+
+    def dataframe(self):
+        """DataFrame поверх заполненных строк без копирования"""
+        return pd.DataFrame(self.as_dict(), copy=False)
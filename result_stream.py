@@ -0,0 +1,154 @@
+"""
+result_stream.py
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+class ResultStream:
+    """Потоковая запись строк результатов на диск с контрольными точками.
+
+    Строки хранятся в двоичном файле записями фиксированной длины
+    (структурный dtype NumPy) и дописываются группами по group_rows строк.
+    Не чаще одного раза в checkpoint_interval секунд данные сбрасываются
+    на диск, а число подтвержденных строк атомарно записывается в файл
+    контрольной точки <path>.json. При повторном открытии с тем же ключом
+    запуска подтвержденные строки читаются обратно, а хвост после последней
+    контрольной точки отбрасывается.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, path, columns, dtypes=None, run_key=None,
+                 group_rows=256, checkpoint_interval=5.0):
+        dtypes = dtypes or {}
+        self.path = Path(path)
+        self.checkpoint_path = Path(str(path) + '.json')
+        self.dtype = np.dtype([(name, dtypes.get(name, np.float64)) for name in columns])
+        self.run_key = run_key
+        self.group_rows = group_rows
+        self.checkpoint_interval = checkpoint_interval
+
+        self.rows = 0
+        self.complete = False
+        self._pending = []
+        self._pending_rows = 0
+        self._written_rows = 0
+        self._last_checkpoint = 0.0
+        self._file = None
+
+    def open(self, resume=True):
+        """
+        Открытие потока для записи
+
+        Returns:
+            dict: ранее подтвержденные строки в виде столбцов (пустые, если
+                  продолжать нечего или resume=False)
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        checkpoint = self._read_checkpoint() if resume else None
+
+        rows = checkpoint['rows'] if checkpoint else 0
+        self.complete = bool(checkpoint and checkpoint['complete'])
+        if rows:
+            records = np.fromfile(self.path, dtype=self.dtype, count=rows)
+            self._file = open(self.path, 'r+b')
+        else:
+            records = np.empty(0, dtype=self.dtype)
+            self._file = open(self.path, 'wb')
+
+        # Отбрасываем строки, записанные после последней контрольной точки
+        self._file.truncate(rows * self.dtype.itemsize)
+        self._file.seek(0, os.SEEK_END)
+        self.rows = self._written_rows = rows
+
+        self._last_checkpoint = time.monotonic()
+        if not rows:
+            self._write_checkpoint()
+
+        return {name: records[name] for name in self.dtype.names}
+
+    def append(self, columns):
+        """Добавление блока строк (словарь столбцов одинаковой длины)"""
+        n = len(next(iter(columns.values())))
+        if not n:
+            return
+
+        records = np.empty(n, dtype=self.dtype)
+        for name in self.dtype.names:
+            records[name] = columns[name]
+        self._pending.append(records)
+        self._pending_rows += n
+
+        if self._pending_rows >= self.group_rows:
+            self.flush()
+            if time.monotonic() - self._last_checkpoint >= self.checkpoint_interval:
+                self.checkpoint()
+
+    def flush(self):
+        """Запись накопленной группы строк в файл"""
+        if not self._pending:
+            return
+        self._file.write(np.concatenate(self._pending).tobytes())
+        self._written_rows += self._pending_rows
+        self._pending = []
+        self._pending_rows = 0
+
+    def checkpoint(self):
+        """Сброс данных на диск и фиксация числа записанных строк"""
+        self.flush()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.rows = self._written_rows
+        self._write_checkpoint()
+        self._last_checkpoint = time.monotonic()
+
+    def close(self, complete=False):
+        """Финальная контрольная точка и закрытие файла"""
+        if self._file is None:
+            return
+        self.complete = complete
+        self.checkpoint()
+        self._file.close()
+        self._file = None
+
+    def _read_checkpoint(self):
+        """Контрольная точка, если она относится к тому же запуску и файлу"""
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if (checkpoint.get('version') != self.FORMAT_VERSION
+                or checkpoint.get('key') != self._normalized(self.run_key)
+                or checkpoint.get('dtype') != self._normalized(self.dtype.descr)):
+            return None
+
+        rows = int(checkpoint.get('rows', 0))
+        if not self.path.exists() or self.path.stat().st_size < rows * self.dtype.itemsize:
+            return None
+        return {'rows': rows, 'complete': bool(checkpoint.get('complete', False))}
+
+    def _write_checkpoint(self):
+        checkpoint = {
+            'version': self.FORMAT_VERSION,
+            'key': self.run_key,
+            'dtype': self.dtype.descr,
+            'rows': self.rows,
+            'complete': self.complete
+        }
+        tmp_path = self.checkpoint_path.with_name(self.checkpoint_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    @staticmethod
+    def _normalized(value):
+        """Значение в том виде, в каком оно читается из JSON (кортежи -> списки)"""
+        return json.loads(json.dumps(value))
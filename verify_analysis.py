@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+verify_analysis.py
+Проверка совпадения результатов ускоренных путей полного анализа
+
+На первых --frames кадрах сеанса сравниваются пиксельные площади лап
+и примененные пороги бинаризации:
+
+    - атлас ROI (RoiAtlas) и обработка каждого ROI отдельно (RoiProcessor);
+    - полный анализ в одном процессе и покадровое измерение ROI;
+    - параллельный анализ по диапазонам кадров и анализ в одном процессе;
+    - анализ, отмененный и продолженный с контрольной точки (ResultStream),
+      и непрерывный анализ.
+
+Совпадение должно быть точным (NaN — лапа не анализировалась — совпадает с NaN).
+С --threshold -1 --otsu-check-frames N то же проверяется для повторного
+использования порога Otsu (OtsuThresholdTracker).
+
+Пример запуска:
+    python verify_analysis.py video.mp4 videoDLC.csv --frames 300 --workers 2
+"""
+
+import sys
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from analysis_engine import AnalysisEngine, AnalysisObserver, AnalysisCancelled
+from frame_source import SequentialFrameReader
+from parallel_analysis import raw_area_buffer
+from paw_area import OtsuThresholdTracker
+
+
+class StatusLog(AnalysisObserver):
+    """Наблюдатель, сохраняющий статусы анализа"""
+
+    def __init__(self):
+        self.statuses = []
+
+    def on_status(self, status):
+        self.statuses.append(status)
+
+
+def otsu_tracker(engine, threshold_value):
+    """Трекер порога Otsu с параметрами ядра или None (как в полном анализе)"""
+    if threshold_value == -1 and engine.otsu_check_frames > 0:
+        return OtsuThresholdTracker(engine.otsu_check_frames, engine.otsu_drift_tolerance,
+                                    engine.otsu_segment_frames)
+    return None
+
+
+def measure_frames(engine, frame_indices, threshold_value, filters, atlas_frames):
+    """
+    Площади и пороги лап, измеренные напрямую через PawAreaAnalyzer
+
+    Returns:
+        dict: столбцы raw_area_buffer в порядке кадров
+    """
+    paw_names = list(engine.paw_groups.keys())
+    bboxes, bbox_valid = engine.paw_bboxes()
+    buffer = raw_area_buffer(paw_names, len(frame_indices))
+
+    reader = SequentialFrameReader(engine.video_path)
+    try:
+        frame_areas = engine.area_analyzer.iter_frame_areas(
+            reader.iter_frames(frame_indices), bboxes, bbox_valid, paw_names,
+            threshold_value, filters, atlas_frames=atlas_frames,
+            otsu_tracker=otsu_tracker(engine, threshold_value)
+        )
+        for frame_idx, areas, thresholds in frame_areas:
+            row = buffer.add_row()
+            buffer['frame'][row] = frame_idx
+            for paw_name in paw_names:
+                if areas[paw_name] is not None:
+                    buffer[f'{paw_name}_area_px'][row] = areas[paw_name]
+                if paw_name in thresholds:
+                    buffer[f'{paw_name}_threshold'][row] = thresholds[paw_name]
+    finally:
+        reader.close()
+
+    return buffer.as_dict()
+
+
+def analyze_raw(engine, threshold_value, filters, end_frame, **kwargs):
+    """Пиксельные результаты полного анализа кадров [0, end_frame)"""
+    engine.raw_results = None
+    engine.analyze_entire_video(threshold_value, filters, end_frame=end_frame, **kwargs)
+    return engine.raw_results
+
+
+def analyze_resumed(engine, threshold_value, filters, end_frame, checkpoint_path,
+                    cancel_at, n_workers=1):
+    """
+    Анализ, отмененный на cancel_at процентах и продолженный с контрольной точки
+
+    Returns:
+        tuple: (пиксельные результаты или None, если отмена не сработала,
+                статус продолжения анализа)
+    """
+    def cancel(progress):
+        if progress >= cancel_at:
+            engine.request_cancel()
+
+    progress_interval = engine.progress_interval
+    engine.progress_interval = 0
+    try:
+        analyze_raw(engine, threshold_value, filters, end_frame, n_workers=n_workers,
+                    checkpoint_path=checkpoint_path, progress_callback=cancel)
+    except AnalysisCancelled:
+        pass
+    else:
+        return None, ''
+    finally:
+        engine.progress_interval = progress_interval
+
+    log = StatusLog()
+    engine.add_observer(log)
+    try:
+        raw = analyze_raw(engine, threshold_value, filters, end_frame, n_workers=n_workers,
+                          checkpoint_path=checkpoint_path)
+    finally:
+        engine.remove_observer(log)
+
+    resumed = next((status for status in log.statuses if status.startswith("Продолжение")), '')
+    return raw, resumed
+
+
+def mismatched_frames(expected, actual, paw_names):
+    """Кадры, где площадь или порог какой-либо лапы различаются (None — разные наборы кадров)"""
+    if not np.array_equal(expected['frame'], actual['frame']):
+        return None
+
+    mismatch = np.zeros(len(expected['frame']), dtype=bool)
+    for paw_name in paw_names:
+        for column in (f'{paw_name}_area_px', f'{paw_name}_threshold'):
+            a, b = expected[column], actual[column]
+            mismatch |= ~((a == b) | (np.isnan(a) & np.isnan(b)))
+    return expected['frame'][mismatch]
+
+
+def report(title, expected, actual, paw_names, details=''):
+    """Вывод результата одной проверки; True — результаты совпадают"""
+    frames = mismatched_frames(expected, actual, paw_names)
+    suffix = f" ({details})" if details else ''
+
+    if frames is None:
+        print(f"❌ {title}: различаются наборы кадров "
+              f"({len(expected['frame'])} и {len(actual['frame'])}){suffix}")
+        return False
+    if len(frames):
+        shown = ', '.join(str(frame) for frame in frames[:10])
+        print(f"❌ {title}: расхождения в {len(frames)} кадрах: {shown}{suffix}")
+        return False
+
+    print(f"✅ {title}: совпадают, {len(expected['frame'])} кадров{suffix}")
+    return True
+
+
+def run_checks(engine, end_frame, threshold_value, filters=None, n_workers=2, cancel_at=50):
+    """
+    Все проверки на кадрах [0, end_frame)
+
+    Returns:
+        bool: все результаты совпали
+    """
+    paw_names = list(engine.paw_groups.keys())
+    frame_indices = list(range(end_frame))
+    atlas_frames = engine.roi_atlas_frames or 8
+    results = []
+
+    per_roi = measure_frames(engine, frame_indices, threshold_value, filters, atlas_frames=0)
+    atlas = measure_frames(engine, frame_indices, threshold_value, filters, atlas_frames=atlas_frames)
+    results.append(report("Атлас ROI и отдельные ROI", per_roi, atlas, paw_names,
+                          f"атлас по {atlas_frames} кадров"))
+
+    full = analyze_raw(engine, threshold_value, filters, end_frame, n_workers=1)
+    results.append(report("Полный анализ и покадровое измерение ROI", per_roi, full, paw_names))
+
+    if n_workers != 1:
+        parallel = analyze_raw(engine, threshold_value, filters, end_frame, n_workers=n_workers)
+        results.append(report("Параллельный и однопроцессный анализ", full, parallel, paw_names,
+                              f"процессов: {n_workers}"))
+
+    with tempfile.TemporaryDirectory() as directory:
+        checkpoint_path = Path(directory) / "verify.stream"
+        resumed, status = analyze_resumed(engine, threshold_value, filters, end_frame,
+                                          checkpoint_path, cancel_at)
+        if resumed is None:
+            print(f"❌ Продолжение после отмены: анализ не был отменен на {cancel_at}%")
+            results.append(False)
+        elif not status:
+            print("❌ Продолжение после отмены: ранее обработанные кадры не взяты из файла")
+            results.append(False)
+        else:
+            results.append(report("Продолжение после отмены и непрерывный анализ",
+                                   full, resumed, paw_names, status))
+
+    return all(results)
+
+
+def parse_args(argv=None):
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(
+        description="Проверка совпадения результатов атласа ROI, параллельного анализа "
+                    "и продолжения после отмены"
+    )
+    parser.add_argument('video', help="Видео сеанса")
+    parser.add_argument('pose', help="CSV или .h5 DeepLabCut")
+    parser.add_argument('--config', default='config.yaml', help="Конфигурация DeepLabCut (config.yaml)")
+    parser.add_argument('--frames', type=int, default=300, help="Число первых кадров для проверки")
+    parser.add_argument('--threshold', type=int, default=128,
+                        help="Порог бинаризации (0-255, -1 — автоматический Otsu)")
+    parser.add_argument('--otsu-check-frames', type=int, default=0,
+                        help="При пороге Otsu: проверять гистограмму ROI раз в N кадров "
+                             "(0 — Otsu на каждом кадре)")
+    parser.add_argument('--workers', type=int, default=2,
+                        help="Число процессов параллельного анализа (1 — не проверять)")
+    parser.add_argument('--cancel-at', type=float, default=50,
+                        help="Прогресс (%%), на котором анализ отменяется перед продолжением")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Главная функция"""
+    args = parse_args(argv)
+
+    engine = AnalysisEngine(args.video, args.pose, args.config)
+    engine.otsu_check_frames = args.otsu_check_frames
+    end_frame = min(args.frames, engine.total_frames)
+
+    try:
+        ok = run_checks(engine, end_frame, args.threshold, n_workers=args.workers,
+                        cancel_at=args.cancel_at)
+    finally:
+        engine.close()
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())